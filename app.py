@@ -1,368 +1,763 @@
-from flask import Flask, render_template_string
-from scrapers import scrape_ai_news_aggregated
-from summarize import summarize_text
-from dateutil import parser
+from flask import (Flask, Response, abort, g, has_request_context, render_template_string, jsonify,
+                   request, stream_with_context, url_for)
+import scrapers
+from scrapers import scrape_ai_news_aggregated, SOURCES, BG_GRADIENT
+from summarize import summarize_batch, summary_cache, warm_summary_cache
+from refresh import Refresher
+from store import EXTRACTIVE, SEARCH_CANDIDATES, TEXT_CHARS, ArticleStore, search_query
+from dates import format_date, parse_timestamp
+from dedupe import find_duplicates, minhash, pack, unpack
+import extractive
+from trends import TrendIndex
+from responses import EncodedBody, send_encoded
+from assets import ASSET_CACHE_CONTROL, asset_url, find_asset
+from metrics import Counter, Gauge, Histogram, render as render_metrics
+import base64
 import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+LIMIT_PER_SOURCE = int(os.getenv("LIMIT_PER_SOURCE", "3"))
+REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL_SECONDS", "900"))
+DASHBOARD_ARTICLES = int(os.getenv("DASHBOARD_ARTICLES", str(LIMIT_PER_SOURCE * len(SOURCES))))
+SUMMARY_BACKLOG_LIMIT = int(os.getenv("SUMMARY_BACKLOG_LIMIT", "200"))
+DEDUPE_WINDOW = int(os.getenv("DEDUPE_WINDOW_DAYS", "7")) * 86400
+SUMMARY_DEADLINE = int(os.getenv("SUMMARY_DEADLINE_SECONDS", "90"))
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_ENTRIES = 256
+REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "1") != "0"
+# Render the saved snapshot's page at boot, before the first refresh starts.
+WARM_START = os.getenv("WARM_START", "1") != "0"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") != "0"
+# Shared by every worker started from the same directory; empty keeps the snapshot in memory.
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join("data", "snapshot.json"))
+# A page request older than this refreshes the snapshot itself (e.g. when the background thread is off).
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", str(REFRESH_INTERVAL * 2)))
+# The rendered page is shared with the other workers, and the next boot, through this file.
+PAGE_PATH = SNAPSHOT_PATH + ".page" if SNAPSHOT_PATH else None
+STALE_WHILE_REVALIDATE = os.getenv("STALE_WHILE_REVALIDATE", "1") != "0"
+COLD_START_WAIT = 120
+TRENDS_ON_PAGE = int(os.getenv("TRENDS_ON_PAGE", "8"))
+API_MAX_TRENDS = 50
+
+SOURCE_STYLES = {name: (icon, gradient) for name, _, icon, gradient in SOURCES}
 
 app = Flask(__name__)
+app.jinja_env.globals["asset_url"] = asset_url
+store = ArticleStore()
+trend_index = TrendIndex()
 
-def format_date(date_str):
-    try:
-        dt = parser.parse(date_str)
-        day = dt.day
-        if 4 <= day <= 20 or 24 <= day <= 30:
-            suffix = "th"
-        else:
-            suffix = ["st", "nd", "rd"][day % 10 - 1]
-        formatted = dt.strftime(f"%B {day}{suffix}, %Y")
-        if dt.hour or dt.minute:
-            formatted += dt.strftime(" – %I:%M %p").lstrip("0")
-        return formatted
-    except Exception:
-        return date_str
+# Only what a card shows, so building the page never reads article text.
+CARD_COLUMNS = "id, link, source, title, date, published, summary"
 
-@app.route('/')
-def dashboard():
+
+def source_style(source):
+    """(icon, gradient) of a source, shared by all of its cards"""
+    return SOURCE_STYLES.get(source, ("📰", BG_GRADIENT))
+
+
+class Mention(namedtuple("Mention", "source link")):
+    """Another source that ran a card's story"""
+    __slots__ = ()
+
+    @property
+    def icon(self):
+        return source_style(self.source)[0]
+
+
+class Card(namedtuple("Card", "title link date summary source also")):
+    """
+    A stored story shaped for the dashboard template
+
+    A tuple holding only its own strings: the source's icon and gradient
+    are looked up in SOURCE_STYLES, and the source name is interned, so
+    every card of a source shares one copy of each. Cards are saved in the
+    snapshot file as JSON lists.
+    """
+    __slots__ = ()
+
+    @property
+    def icon(self):
+        return source_style(self.source)[0]
+
+    @property
+    def gradient(self):
+        return source_style(self.source)[1]
+
+    @classmethod
+    def from_json(cls, values):
+        title, link, date, summary, source, also = values
+        return cls(title, link, date, summary, sys.intern(source),
+                   tuple(Mention(sys.intern(other), other_link) for other, other_link in also))
+
+
+def load_cards(values):
+    return [Card.from_json(card) for card in values]
+
+
+def to_card(row, also=()):
+    """Shape a stored article for the dashboard template"""
+    return Card(row["title"], row["link"], format_date(row["published"], row["date"]), row["summary"],
+                sys.intern(row["source"]),
+                tuple(Mention(sys.intern(other["source"]), other["link"]) for other in also))
+
+
+def story_cards(rows):
+    """Cards for story rows, each listing the other sources that ran it"""
+    duplicates = store.duplicates_of((row["id"] for row in rows), columns="source, link, duplicate_of")
+    return [to_card(row, duplicates.get(row["id"], ())) for row in rows]
+
+
+def dashboard_cards():
+    """Cards for the newest DASHBOARD_ARTICLES stories"""
+    return story_cards(store.query(limit=DASHBOARD_ARTICLES, columns=CARD_COLUMNS))
+
+
+def index_trends(rows):
+    """Count the terms of stored rows, with their current summaries, in the trend index"""
+    rows = list(rows)
+    if rows:
+        trend_index.add(store.get_many([row["link"] for row in rows]))
+
+
+def backfill_trends():
+    """
+    Index every summarized article once, for stores that predate the trend
+    index, a page of cards at a time, newest first
+    """
+    if trend_index.indexed() or not store.count():
+        return
+    added, before = 0, None
+    while True:
+        rows = store.query(before=before, limit=5000, stories=False, columns=CARD_COLUMNS)
+        if not rows:
+            break
+        added += trend_index.add(rows)
+        before = (rows[-1]["published"], rows[-1]["id"])
+    if added:
+        print(f" {added} stored articles added to the trend index")
+
+
+def summarize_pending(pending):
+    """
+    Give stored rows that have no summary yet a quick extractive one
+
+    Near-duplicates of another pending row or of a recent story are linked
+    to that story and share its summary. The LLM summaries that replace the
+    extractive ones come later, from upgrade_summaries().
+    """
+    if not pending:
+        return
+    signatures = {row["id"]: minhash(row["title"], row["text"]) for row in pending}
+    known = [(article_id, unpack(signature)) for article_id, signature
+             in store.story_signatures(since=time.time() - DEDUPE_WINDOW)]
+    duplicates = find_duplicates(((row["id"], signatures[row["id"]]) for row in pending), known)
+    store.set_signatures((article_id, pack(signature), duplicates.get(article_id))
+                         for article_id, signature in signatures.items())
+    if duplicates:
+        print(f" {len(duplicates)} near-duplicate articles share an existing story")
+
+    stories = [row for row in pending if row["id"] not in duplicates]
+    store.set_summaries(((row["id"], extractive.summarize(row["text"]) or extractive.summarize(row["title"]))
+                         for row in stories), kind=EXTRACTIVE)
+    store.copy_summaries(duplicates)
+
+
+_upgrade_lock = threading.Lock()
+_upgrader = None
+
+
+def upgrade_summaries():
+    """
+    Replace extractive summaries with LLM ones and republish the page
+
+    Stories the LLM fails on keep their extractive summary and are tried
+    again on the next run. Returns how many were upgraded.
+    """
+    if not _upgrade_lock.acquire(blocking=False):
+        return 0   # already running; it picks up everything pending
+    try:
+        stories = store.llm_pending(limit=SUMMARY_BACKLOG_LIMIT)
+        if not stories:
+            return 0
+        summaries = summarize_batch([(row["text"] or "")[:TEXT_CHARS] for row in stories],
+                                    deadline=SUMMARY_DEADLINE)
+        upgraded = [(row["id"], summary) for row, summary in zip(stories, summaries) if summary is not None]
+        store.set_summaries(upgraded)
+        duplicates = store.duplicates_of(article_id for article_id, _ in upgraded)
+        store.copy_summaries({row["id"]: canonical for canonical, rows in duplicates.items() for row in rows})
+        done = {article_id for article_id, _ in upgraded}
+        index_trends([row for row in stories if row["id"] in done]
+                     + [row for rows in duplicates.values() for row in rows])
+        print(f" {len(upgraded)} of {len(stories)} summaries upgraded by the LLM")
+        if upgraded:
+            refresher.publish(dashboard_cards())
+        return len(upgraded)
+    finally:
+        _upgrade_lock.release()
+
+
+def upgrade_summaries_async():
+    global _upgrader
+    if _upgrader is None or not _upgrader.is_alive():
+        _upgrader = threading.Thread(target=upgrade_summaries, name="summary-upgrade", daemon=True)
+        _upgrader.start()
+
+
+class LiveCards:
+    """
+    Cards of the refresh in progress, published as each source is stored
+
+    Streams waiting on a cold start follow them instead of waiting for the
+    whole refresh. finish() ends the current refresh's cards; the next
+    refresh publishes into a new list.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._cards = []
+
+    def add(self, cards):
+        with self._cond:
+            self._cards.extend(cards)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self._cards = []
+            self._cond.notify_all()
+
+    def follow(self, done, timeout):
+        """Yield cards as they are published until this refresh finishes, done is set or timeout passes"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            cards = self._cards
+        sent = 0
+        while True:
+            with self._cond:
+                while sent == len(cards) and self._cards is cards and not done.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    # done is set without a notify, so check it now and then.
+                    self._cond.wait(min(remaining, 1))
+                batch = cards[sent:]
+            if not batch:
+                return
+            sent += len(batch)
+            yield from batch
+
+
+live_cards = LiveCards()
+
+
+def store_source(source_name, articles):
+    """Store and summarize one scraped source, and publish its cards to waiting streams"""
+    inserted, updated = store.ingest(articles)
+    print(f" {source_name}: {inserted} new and {updated} changed articles stored")
+    links = [article["link"] for article in articles]
+    pending = [row for row in store.get_many(links) if row["summary"] is None]
+    summarize_pending(pending)
+    index_trends(pending)
+    rows = store.get_many(links)
+    # Duplicates were folded into a story that has its own card.
+    live_cards.add(story_cards([row for row in rows if row["summary"] is not None and row["duplicate_of"] is None]))
+
+
+def build_articles():
+    """Scrape all sources, storing and summarizing each as it arrives, and read the latest page from the store"""
     print(" Starting to collect articles from all AI sources...")
     
+    # New or changed articles get an extractive summary here, so the page
+    # never waits on the LLM, which upgrades them in the background.
+    try:
+        articles = scrape_ai_news_aggregated(limit_per_source=LIMIT_PER_SOURCE, on_source=store_source)
+    finally:
+        live_cards.finish()
+    print(f" {len(articles)} articles scraped")
+    # Whatever earlier refreshes left unsummarized.
+    pending = store.unsummarized(limit=SUMMARY_BACKLOG_LIMIT)
+    summarize_pending(pending)
+    index_trends(pending)
+    upgrade_summaries_async()
     
-    articles = scrape_ai_news_aggregated(limit_per_source=3)
-    
-   
-    processed_articles = []
-    for article in articles:
-        try:
-           
-            summary = summarize_text(article["text"][:1000])
-            
-            processed_articles.append({
-                "title": article["title"],
-                "link": article["link"],
-                "date": format_date(article["date"]),
-                "summary": summary,
-                "source": article["source"],
-                "gradient": article["gradient"],
-                "bg_gradient": article["bg_gradient"],
-                "icon": article["icon"]
-            })
-        except Exception as e:
-            print(f"Error processing article: {e}")
-            continue
+    processed_articles = dashboard_cards()
     
     print(f" Successfully processed {len(processed_articles)} articles!")
-    
-   
-    sources = list(set(article["source"] for article in processed_articles))
-    
-    return render_template_string(HTML_TEMPLATE, 
-                                  articles=processed_articles, 
-                                  total_articles=len(processed_articles),
-                                  total_sources=len(sources))
+    return processed_articles
 
 
-HTML_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI Trends Dashboard - Multi-Source</title>
-    <link href="https://fonts.googleapis.com/css2?family=Quicksand:wght@400;500;600;700&display=swap" rel="stylesheet">
+def prerender(snapshot):
+    """Render a new snapshot's page right away, so no visitor waits for it"""
+    with app.test_request_context("/"):
+        render_page(snapshot)
 
 
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
+refresher = Refresher(build_articles, interval=REFRESH_INTERVAL, path=SNAPSHOT_PATH or None,
+                      on_snapshot=prerender, load_articles=load_cards)
 
-       body {
-        font-family: 'Quicksand', sans-serif;
-        background: linear-gradient(135deg, #0f172a 0%, #1e293b 50%, #334155 100%);
-        color: white;
-        min-height: 100vh;
-        overflow-x: hidden;
-    }
 
-        /* Animated Background */
-        .bg-overlay {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: 
-                radial-gradient(circle at 20% 80%, rgba(120, 119, 198, 0.3) 0%, transparent 50%),
-                radial-gradient(circle at 80% 20%, rgba(255, 119, 198, 0.3) 0%, transparent 50%),
-                radial-gradient(circle at 40% 40%, rgba(120, 219, 255, 0.2) 0%, transparent 50%);
-            animation: bgFloat 20s ease-in-out infinite;
-            pointer-events: none;
-            z-index: -1;
-        }
+REQUEST_SECONDS = Histogram("http_request_seconds",
+                            "Time to build a response, to the first byte for streamed pages", ["endpoint"])
+STAGE_SECONDS = Histogram("request_stage_seconds", "Time spent in each stage of serving a request", ["stage"])
+RESPONSE_CACHE_LOOKUPS = Counter("response_cache_lookups_total", "Rendered page and API response cache lookups",
+                                 ["cache", "result"])
+Gauge("snapshot_age_seconds", "Age of the snapshot being served",
+      function=lambda: refresher.snapshot.age if refresher.snapshot else None)
+Gauge("snapshot_version", "Version of the snapshot being served",
+      function=lambda: refresher.snapshot.version if refresher.snapshot else None)
+Gauge("snapshot_articles", "Cards in the snapshot being served",
+      function=lambda: len(refresher.snapshot.articles) if refresher.snapshot else None)
+Gauge("refresh_duration_seconds", "How long the last successful refresh took",
+      function=lambda: refresher.snapshot.duration if refresher.snapshot else None)
+Gauge("stored_articles", "Articles in the article store", function=lambda: store.count())
 
-        @keyframes bgFloat {
-            0%, 100% { transform: rotate(0deg) scale(1); }
-            50% { transform: rotate(180deg) scale(1.1); }
-        }
 
-        /* Container */
-        .container {
-            max-width: 1600px;
-            margin: 0 auto;
-            padding: 2rem;
-        }
+@contextmanager
+def timed(stage):
+    """Record a stage of the current request, for /metrics and the Server-Timing header"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if has_request_context():
+            g.setdefault("timings", []).append((stage, elapsed))
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_timing(response):
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+    if SERVER_TIMING:
+        stages = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in g.get("timings", ())]
+        response.headers["Server-Timing"] = ", ".join(stages + [f"total;dur={elapsed * 1000:.1f}"])
+    return response
+
+
+def format_updated(timestamp):
+    # The page is cached per snapshot, so the server renders a fixed time
+    # and dashboard.js turns it into a relative age in the browser.
+    return time.strftime("%H:%M UTC", time.gmtime(timestamp))
+
+
+def current_snapshot():
+    """
+    The snapshot to serve, refreshed first if it is older than SNAPSHOT_MAX_AGE
+
+    Concurrent requests share a single refresh. With STALE_WHILE_REVALIDATE
+    the stale snapshot is served right away while that refresh runs in the
+    background.
+    """
+    snapshot = refresher.snapshot
+    if snapshot is None or snapshot.age < SNAPSHOT_MAX_AGE:
+        return snapshot
+    if STALE_WHILE_REVALIDATE:
+        refresher.refresh_async(if_older_than=SNAPSHOT_MAX_AGE)
+        return snapshot
+    return refresher.refresh(if_older_than=SNAPSHOT_MAX_AGE) or snapshot
+
+
+def iter_cold_start_cards():
+    """
+    Cards of the first refresh as each source is stored
+
+    Every request waiting on a cold start follows the one shared refresh.
+    When another worker is running it, its snapshot is read from disk once
+    written.
+    """
+    done = threading.Event()
+
+    def wait_for_refresh():
+        try:
+            refresher.refresh(if_older_than=SNAPSHOT_MAX_AGE, timeout=COLD_START_WAIT)
+        finally:
+            done.set()
+
+    threading.Thread(target=wait_for_refresh, name="cold-start-wait", daemon=True).start()
+    deadline = time.monotonic() + COLD_START_WAIT
+    sent = 0
+    for card in live_cards.follow(done, COLD_START_WAIT):
+        sent += 1
+        yield card
+    if sent:
+        return
+    snapshot = refresher.snapshot
+    # Another worker holds the refresh lock; its snapshot shows up on disk.
+    while snapshot is None and refresher.state == "waiting" and time.monotonic() < deadline:
+        time.sleep(1)
+        snapshot = refresher.snapshot
+    yield from snapshot.articles if snapshot else ()
+
+
+def render_stream(cards, updated, updated_at=None):
+    """Send the page shell first, then each card, then the final stats"""
+    yield app.jinja_env.from_string(PAGE_HEAD).render(
+        total_articles=0, total_sources=0, updated=updated, updated_at=updated_at,
+        reload_page=False)
+    yield STREAM_GRID_OPEN
+    card_template = app.jinja_env.from_string(CARD_TEMPLATE)
+    count, sources = 0, set()
+    for card in cards:
+        count += 1
+        sources.add(card.source)
+        yield card_template.render(article=card, animate=True)
+    yield app.jinja_env.from_string(STREAM_TAIL).render(
+        total_articles=count, total_sources=len(sources))
+
+
+@app.route('/stream')
+def dashboard_stream():
+    snapshot = current_snapshot()
+    if snapshot:
+        cards, updated, updated_at = snapshot.articles, format_updated(snapshot.created_at), snapshot.created_at
+    else:
+        # Nothing built yet: serve what the store already has while the
+        # first refresh runs, or wait for that refresh on a cold start. The
+        # shell is streamed first either way.
+        with timed("store"):
+            stored = store.query(limit=DASHBOARD_ARTICLES, columns=CARD_COLUMNS)
+        if stored:
+            refresher.refresh_async(if_older_than=SNAPSHOT_MAX_AGE)
+            cards = story_cards(stored)
+        else:
+            cards = iter_cold_start_cards()
+        updated, updated_at = "Live", None
+    return Response(stream_with_context(render_stream(cards, updated, updated_at)),
+                    mimetype="text/html",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+_page_cache = None
+_page_lock = threading.Lock()
+
+# Width and height of each rising term's sparkline, in SVG units.
+TREND_CHART_SIZE = (120, 28)
+
+
+def trend_chart(trends):
+    """Rising terms with their daily counts as sparkline polyline points"""
+    width, height = TREND_CHART_SIZE
+    chart = []
+    for trend in trends["terms"]:
+        series = trend["series"]
+        top = max(series) or 1
+        step = width / max(1, len(series) - 1)
+        points = " ".join(f"{i * step:.1f},{height - 1 - value / top * (height - 2):.1f}"
+                          for i, value in enumerate(series))
+        chart.append(dict(trend, points=points))
+    return chart
+
+
+def render_page(snapshot):
+    """
+    Rendered and compressed page for a snapshot, built once per version
+
+    With a snapshot file the result is saved next to it, so other workers
+    and a restarted one load it instead of rendering it again.
+    """
+    global _page_cache
+    cached = _page_cache
+    if cached and cached[0] == snapshot.version:
+        RESPONSE_CACHE_LOOKUPS.inc(cache="page", result="hit")
+        return cached[1]
+    # One caller renders a new version; concurrent ones wait and reuse it,
+    # or with STALE_WHILE_REVALIDATE get the previous page in the meantime.
+    if not _page_lock.acquire(blocking=cached is None or not STALE_WHILE_REVALIDATE):
+        RESPONSE_CACHE_LOOKUPS.inc(cache="page", result="stale")
+        return cached[1]
+    try:
+        cached = _page_cache
+        if cached and cached[0] == snapshot.version:
+            RESPONSE_CACHE_LOOKUPS.inc(cache="page", result="hit")
+            return cached[1]
+        encoded, meta = EncodedBody.load(PAGE_PATH) if PAGE_PATH else (None, None)
+        if encoded is not None and meta == {"version": snapshot.version, "created_at": snapshot.created_at}:
+            # Another worker, or this one before a restart, already rendered it.
+            RESPONSE_CACHE_LOOKUPS.inc(cache="page", result="shared")
+            _page_cache = (snapshot.version, encoded)
+            return encoded
+        RESPONSE_CACHE_LOOKUPS.inc(cache="page", result="miss")
+
+        processed_articles = snapshot.articles
+        sources = list(set(article.source for article in processed_articles))
+
+        with timed("trends"):
+            trends = trend_chart(trend_index.rising(limit=TRENDS_ON_PAGE))
+        with timed("render"):
+            html = render_template_string(HTML_TEMPLATE, 
+                                          articles=processed_articles, 
+                                          trends=trends,
+                                          chart_size=TREND_CHART_SIZE,
+                                          total_articles=len(processed_articles),
+                                          total_sources=len(sources),
+                                          updated=format_updated(snapshot.created_at),
+                                          updated_at=snapshot.created_at,
+                                          reload_page=not processed_articles)
+        with timed("compress"):
+            encoded = EncodedBody(html.encode("utf-8"))
+        if PAGE_PATH:
+            try:
+                encoded.save(PAGE_PATH, version=snapshot.version, created_at=snapshot.created_at)
+            except OSError as e:
+                print(f"Could not save page to {PAGE_PATH}: {e}")
+        _page_cache = (snapshot.version, encoded)
+    finally:
+        _page_lock.release()
+    return encoded
 
-        /* Hero Section */
-        .hero {
-            text-align: center;
-            margin-bottom: 4rem;
-            padding: 4rem 2rem;
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(20px);
-            border-radius: 2rem;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            box-shadow: 0 25px 50px rgba(0, 0, 0, 0.3);
-        }
 
-        .hero h1 {
-            font-size: clamp(2.5rem, 5vw, 4rem);
-            font-weight: 800;
-            margin-bottom: 1rem;
-            background: linear-gradient(135deg, #fff 0%, #e2e8f0 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }
+@app.route('/')
+def dashboard():
+    snapshot = current_snapshot()
+    if snapshot is None or request.args.get("stream"):
+        return dashboard_stream()
+    return send_encoded(render_page(snapshot), "text/html", cache_control="no-cache")
 
-        .hero p {
-            font-size: 1.25rem;
-            color: rgba(255, 255, 255, 0.8);
-            max-width: 700px;
-            margin: 0 auto 2rem auto;
-            line-height: 1.6;
-        }
 
-        .stats {
-            display: flex;
-            justify-content: center;
-            gap: 3rem;
-            flex-wrap: wrap;
-            margin-top: 2rem;
-        }
+@app.route('/assets/<filename>')
+def assets(filename):
+    asset = find_asset(filename)
+    if asset is None:
+        abort(404)
+    return send_encoded(asset.body, asset.mimetype, cache_control=ASSET_CACHE_CONTROL)
 
-        .stat {
-            text-align: center;
-        }
 
-        .stat-number {
-            font-size: 2.5rem;
-            font-weight: 700;
-            display: block;
-            background: linear-gradient(135deg, #fbbf24 0%, #f59e0b 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(f"{row['published']}:{row['id']}".encode()).decode().rstrip("=")
 
-        .stat-label {
-            font-size: 0.875rem;
-            color: rgba(255, 255, 255, 0.6);
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-top: 0.5rem;
-        }
 
-        /* Section Title */
-        .section-title {
-            text-align: center;
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin-bottom: 3rem;
-            position: relative;
-        }
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published, article_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(published), int(article_id)
+    except Exception:
+        raise ValueError("invalid cursor")
 
-        .section-title::after {
-            content: '';
-            display: block;
-            width: 100px;
-            height: 4px;
-            background: linear-gradient(135deg, #fbbf24 0%, #f59e0b 100%);
-            margin: 1rem auto;
-            border-radius: 2px;
-        }
 
-        /* RESPONSIVE GRID - More articles */
-        .articles-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-            gap: 2rem;
-            margin: 2rem 0;
-        }
+def parse_since(value, name="since"):
+    if value.isdigit():
+        return int(value)
+    timestamp = parse_timestamp(value)
+    if not timestamp:
+        raise ValueError(f"invalid {name}")
+    return timestamp
 
-        /* Ensure minimum 3 columns on large screens */
-        @media (min-width: 1200px) {
-            .articles-grid {
-                grid-template-columns: repeat(3, 1fr);
-            }
-        }
 
-        @media (min-width: 1600px) {
-            .articles-grid {
-                grid-template-columns: repeat(4, 1fr);
-            }
-        }
+def parse_api_args(args):
+    try:
+        limit = int(args.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("invalid limit")
+    limit = max(1, min(limit, API_MAX_PAGE_SIZE))
+    cursor = args.get("cursor")
+    since = args.get("since")
+    return {
+        "source": args.get("source") or None,
+        "since": parse_since(since) if since else None,
+        "before": decode_cursor(cursor) if cursor else None,
+        "limit": limit,
+    }
 
-        @media (max-width: 768px) {
-            .articles-grid {
-                grid-template-columns: 1fr;
-                gap: 1.5rem;
-            }
-            
-            .container {
-                padding: 1rem;
-            }
-            
-            .hero {
-                padding: 2rem 1rem;
-            }
-        }
 
-        /* Article Cards */
-        .card {
-            background: rgba(255, 255, 255, 0.08);
-            backdrop-filter: blur(20px);
-            border-radius: 1.5rem;
-            padding: 2rem;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-            position: relative;
-            overflow: hidden;
-            min-height: 400px;
-            display: flex;
-            flex-direction: column;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.2);
-            opacity: 0;
-            transform: translateY(30px);
-        }
+def parse_search_args(args):
+    """Keyword arguments for store.search() from a query string"""
+    query = parse_api_args(args)
+    del query["before"]
+    try:
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        raise ValueError("invalid offset")
+    order = args.get("sort", "rank")
+    if order not in ("rank", "date"):
+        raise ValueError("invalid sort")
+    until = args.get("until")
+    query.update(
+        query=search_query(args.get("q", "")),
+        until=parse_since(until, "until") if until else None,
+        order=order,
+        offset=max(0, min(offset, SEARCH_CANDIDATES)),
+    )
+    return query
+
+
+def search_page_rows(query):
+    """One page of search results and the offset of the next one, if any"""
+    with timed("search"):
+        rows = store.search(**dict(query, limit=query["limit"] + 1))
+    next_offset = query["offset"] + query["limit"]
+    if len(rows) <= query["limit"] or next_offset >= SEARCH_CANDIDATES:
+        next_offset = None
+    return rows[:query["limit"]], next_offset
+
+
+def article_json(row, also=()):
+    """Shape a stored article for the JSON API"""
+    return {
+        "title": row["title"],
+        "link": row["link"],
+        "date": format_date(row["published"], row["date"]),
+        "published": row["published"],
+        "summary": row["summary"],
+        # Summaries stored before summary_kind existed all came from the LLM.
+        "summary_kind": row["summary_kind"] or ("llm" if row["summary"] is not None else None),
+        "source": row["source"],
+        "also": [{"source": other["source"], "link": other["link"]} for other in also],
+    }
 
-        .card.animate {
-            opacity: 1;
-            transform: translateY(0);
-        }
 
-        .card::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            border-radius: 1.5rem 1.5rem 0 0;
-        }
+_api_cache = {}
+_api_cache_lock = threading.Lock()
+
+
+def cached_api_response(key, build):
+    """
+    Encoded JSON for key, built once per snapshot version
+
+    Responses only change when a refresh lands, so they are served from
+    memory until the snapshot version moves on. build returns the body.
+    """
+    snapshot = refresher.snapshot
+    version = snapshot.version if snapshot else 0
+    key = (version,) + key
+    with _api_cache_lock:
+        encoded = _api_cache.get(key)
+    RESPONSE_CACHE_LOOKUPS.inc(cache="api", result="miss" if encoded is None else "hit")
+    if encoded is None:
+        body = json.dumps(build(version), ensure_ascii=False)
+        with timed("compress"):
+            encoded = EncodedBody(body.encode("utf-8"))
+        with _api_cache_lock:
+            if any(cached[0] != version for cached in _api_cache) or len(_api_cache) >= API_CACHE_ENTRIES:
+                _api_cache.clear()
+            _api_cache[key] = encoded
+    return send_encoded(encoded, "application/json", cache_control="public, max-age=60")
+
+
+@app.route('/api/articles')
+def api_articles():
+    try:
+        query = parse_api_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
 
-        .card:hover {
-            transform: translateY(-8px);
-            box-shadow: 0 32px 60px rgba(0, 0, 0, 0.4);
-            border-color: rgba(255, 255, 255, 0.2);
+    def build(version):
+        with timed("store"):
+            rows = store.query(source=query["source"], since=query["since"],
+                               before=query["before"], limit=query["limit"] + 1)
+            page, has_more = rows[:query["limit"]], len(rows) > query["limit"]
+            duplicates = store.duplicates_of(row["id"] for row in page)
+        return {
+            "articles": [article_json(row, duplicates.get(row["id"], ())) for row in page],
+            "next_cursor": encode_cursor(page[-1]) if has_more else None,
+            "snapshot_version": version,
         }
 
-        .card-header {
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            margin-bottom: 1.5rem;
-            flex-wrap: wrap;
-            gap: 1rem;
-        }
+    return cached_api_response(("articles",) + tuple(sorted(query.items())), build)
 
-        .source-badge {
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            padding: 0.75rem 1.25rem;
-            border-radius: 2rem;
-            font-size: 0.875rem;
-            font-weight: 600;
-            color: white;
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3);
-        }
 
-        .date {
-            font-size: 0.875rem;
-            color: rgba(255, 255, 255, 0.6);
-            font-weight: 500;
-        }
+@app.route('/api/search')
+def api_search():
+    try:
+        query = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
 
-        .card-title {
-            font-size: 1.25rem;
-            font-weight: 600;
-            line-height: 1.4;
-            margin: 0 0 1rem 0;
-            color: #fff;
-            display: -webkit-box;
-            -webkit-line-clamp: 3;
-            -webkit-box-orient: vertical;
-            overflow: hidden;
+    def build(version):
+        page, next_offset = search_page_rows(query)
+        duplicates = store.duplicates_of(row["id"] for row in page)
+        return {
+            "articles": [dict(article_json(row, duplicates.get(row["id"], ())), score=round(-row["score"], 3))
+                         for row in page],
+            "next_offset": next_offset,
+            "snapshot_version": version,
         }
 
-        .card-title a {
-            text-decoration: none;
-            color: inherit;
-            transition: color 0.3s ease;
-        }
+    return cached_api_response(("search",) + tuple(sorted(query.items())), build)
 
-        .card-title a:hover {
-            color: #fbbf24;
-        }
 
-        .card-summary {
-            flex: 1;
-            font-size: 0.95rem;
-            line-height: 1.6;
-            color: rgba(255, 255, 255, 0.8);
-            margin-bottom: 1.5rem;
-            display: -webkit-box;
-            -webkit-line-clamp: 4;
-            -webkit-box-orient: vertical;
-            overflow: hidden;
-        }
+@app.route('/search')
+def search_page():
+    text = request.args.get("q", "").strip()
+    cards, next_url, error, status = [], None, None, 200
+    try:
+        query = parse_search_args(request.args)
+    except ValueError as e:
+        if text:
+            error, status = str(e).capitalize(), 400
+    else:
+        page, next_offset = search_page_rows(query)
+        cards = story_cards(page)
+        if next_offset is not None:
+            next_url = url_for("search_page", **dict(request.args.items(), offset=next_offset))
+
+    snapshot = refresher.snapshot
+    with timed("render"):
+        html = render_template_string(SEARCH_TEMPLATE,
+                                      articles=cards,
+                                      query=text,
+                                      error=error,
+                                      next_url=next_url,
+                                      total_articles=len(cards),
+                                      total_sources=len({card.source for card in cards}),
+                                      updated=format_updated(snapshot.created_at) if snapshot else "Live",
+                                      updated_at=snapshot.created_at if snapshot else None,
+                                      reload_page=False)
+    return Response(html, status=status, mimetype="text/html", headers={"Cache-Control": "no-cache"})
+
+
+@app.route('/api/trends')
+def api_trends():
+    try:
+        limit = int(request.args.get("limit", TRENDS_ON_PAGE))
+    except ValueError:
+        return jsonify(error="invalid limit"), 400
+    limit = max(1, min(limit, API_MAX_TRENDS))
+    source = request.args.get("source") or None
 
-        .read-more {
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            padding: 0.875rem 1.5rem;
-            color: white;
-            text-decoration: none;
-            border-radius: 0.875rem;
-            font-weight: 600;
-            font-size: 0.875rem;
-            transition: all 0.3s ease;
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3);
-            align-self: flex-start;
-        }
+    def build(version):
+        with timed("trends"):
+            trends = trend_index.rising(source=source, limit=limit)
+        return dict(trends, source=source, snapshot_version=version)
 
-        .read-more:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 12px 24px rgba(0, 0, 0, 0.4);
-        }
+    # The latest day rolls over without a refresh, so it is part of the key.
+    return cached_api_response(("trends", time.time() // 86400, source, limit), build)
 
-        .arrow {
-            transition: transform 0.3s ease;
-        }
 
-        .read-more:hover .arrow {
-            transform: translateX(4px);
-        }
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
-        /* Loading state */
-        .loading {
-            text-align: center;
-            padding: 4rem;
-            color: rgba(255, 255, 255, 0.6);
-        }
-    </style>
+
+@app.route('/status')
+def status():
+    return jsonify(dict(refresher.status(), stored_articles=store.count(),
+                        summary_cache=summary_cache.stats(), polling=scrapers.poll_schedule.status()))
+
+
+PAGE_HEAD = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AI Trends Dashboard - Multi-Source</title>
+    {% if reload_page %}<meta http-equiv="refresh" content="10">{% endif %}
+    <link href="https://fonts.googleapis.com/css2?family=Quicksand:wght@400;500;600;700&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{{ asset_url('dashboard.css') }}">
 </head>
 <body>
     <div class="bg-overlay"></div>
@@ -372,30 +767,52 @@ HTML_TEMPLATE = '''
         <div class="hero">
             <h1> AI Trends Dashboard</h1>
             <p>Comprehensive AI insights from HuggingFace, arXiv, TechCrunch, OpenAI, MIT, VentureBeat & Towards DS</p>
+            <form class="search-form" action="/search" method="get" role="search">
+                <input type="search" name="q" value="{{ query or '' }}" placeholder="Search earlier coverage, e.g. &quot;open source&quot; agent*" aria-label="Search articles">
+            </form>
             <div class="stats">
                 <div class="stat">
-                    <span class="stat-number" data-target="{{ total_articles }}">0</span>
+                    <span class="stat-number" id="stat-articles" data-target="{{ total_articles }}">0</span>
                     <span class="stat-label">Articles</span>
                 </div>
                 <div class="stat">
-                    <span class="stat-number" data-target="{{ total_sources }}">0</span>
+                    <span class="stat-number" id="stat-sources" data-target="{{ total_sources }}">0</span>
                     <span class="stat-label">Sources</span>
                 </div>
                 <div class="stat">
-                    <span class="stat-number">Live</span>
-                    <span class="stat-label">Updates</span>
+                    <span class="stat-number" id="stat-updated" data-updated="{{ updated_at or '' }}">{{ updated }}</span>
+                    <span class="stat-label">Updated</span>
                 </div>
             </div>
         </div>
+'''
 
+SECTION_TITLE = '''
         <!-- Section Title -->
         <h2 class="section-title">Latest AI Insights from Multiple Sources</h2>
+'''
 
-        {% if articles %}
-        <!-- Articles Grid -->
-        <div class="articles-grid" id="articles-grid">
-            {% for article in articles %}
-            <div class="card">
+TRENDS_PANEL = '''
+        {% if trends %}
+        <!-- Rising Topics -->
+        <h2 class="section-title">Rising Topics</h2>
+        <div class="trends-panel">
+            {% for trend in trends %}
+            <div class="trend" title="{{ trend.count }} articles on the latest day, {{ trend.baseline }} a day before">
+                <span class="trend-term">{{ trend.term }}</span>
+                <svg class="trend-chart" viewBox="0 0 {{ chart_size[0] }} {{ chart_size[1] }}" preserveAspectRatio="none" aria-hidden="true">
+                    <polyline points="{{ trend.points }}"/>
+                </svg>
+                <span class="trend-count">{{ trend.count }}</span>
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+'''
+
+# `animate` shows streamed cards as soon as they arrive instead of waiting
+# for the DOMContentLoaded animation.
+CARD_TEMPLATE = '''            <div class="card{{ ' animate' if animate }}">
                 <div style="position: absolute; top: 0; left: 0; right: 0; height: 4px; background: {{ article.gradient }}; border-radius: 1.5rem 1.5rem 0 0;"></div>
                 
                 <div class="card-header">
@@ -411,13 +828,35 @@ HTML_TEMPLATE = '''
                 </h3>
                 
                 <p class="card-summary">{{ article.summary }}</p>
+                {% if article.also %}
+                <div class="also-covered">
+                    Also covered by
+                    {% for other in article.also %}
+                    <a href="{{ other.link }}" target="_blank">{{ other.icon }} {{ other.source }}</a>
+                    {% endfor %}
+                </div>
+                {% endif %}
                 
                 <a href="{{ article.link }}" target="_blank" class="read-more" style="background: {{ article.gradient }};">
                     Read Full Article
                     <span class="arrow">→</span>
                 </a>
             </div>
-            {% endfor %}
+'''
+
+PAGE_TAIL = '''    </div>
+
+    <script src="{{ asset_url('dashboard.js') }}"></script>
+</body>
+</html>
+'''
+
+HTML_TEMPLATE = PAGE_HEAD + TRENDS_PANEL + SECTION_TITLE + '''
+        {% if articles %}
+        <!-- Articles Grid -->
+        <div class="articles-grid" id="articles-grid">
+            {% for article in articles %}
+''' + CARD_TEMPLATE + '''            {% endfor %}
         </div>
         {% else %}
         <div class="loading">
@@ -425,48 +864,93 @@ HTML_TEMPLATE = '''
             <p>This might take a moment as we gather the latest insights.</p>
         </div>
         {% endif %}
-    </div>
-
-    <script>
-        // Animate counter
-        function animateCounter(element, target) {
-            let current = 0;
-            const increment = target / 40;
-            const timer = setInterval(() => {
-                current += increment;
-                if (current >= target) {
-                    element.textContent = target;
-                    clearInterval(timer);
-                } else {
-                    element.textContent = Math.ceil(current);
-                }
-            }, 30);
-        }
+''' + PAGE_TAIL
 
-        // Initialize animations
-        document.addEventListener('DOMContentLoaded', function() {
-            // Animate cards with staggered timing
-            const cards = document.querySelectorAll('.card');
-            cards.forEach((card, index) => {
-                setTimeout(() => {
-                    card.classList.add('animate');
-                }, index * 100);
-            });
-            
-            // Animate counters
-            setTimeout(() => {
-                document.querySelectorAll('[data-target]').forEach(el => {
-                    const target = parseInt(el.dataset.target);
-                    if (!isNaN(target)) {
-                        animateCounter(el, target);
-                    }
-                });
-            }, 500);
-        });
-    </script>
-</body>
-</html>
+SEARCH_TEMPLATE = PAGE_HEAD + '''
+        <h2 class="section-title">{% if query %}Results for “{{ query }}”{% else %}Search Articles{% endif %}</h2>
+        {% if articles %}
+        <div class="articles-grid" id="articles-grid">
+            {% for article in articles %}
+''' + CARD_TEMPLATE + '''            {% endfor %}
+        </div>
+        {% if next_url %}
+        <a class="more-results" href="{{ next_url }}">More results <span class="arrow">→</span></a>
+        {% endif %}
+        {% else %}
+        <div class="loading">
+            {% if error %}
+            <h3>{{ error }}</h3>
+            {% elif query %}
+            <h3>No articles match “{{ query }}”</h3>
+            <p>Try fewer words, or end a word with * to match anything starting with it.</p>
+            {% else %}
+            <h3>Search every article collected so far</h3>
+            <p>Filter with source=, since= and until=, or sort=date for newest first.</p>
+            {% endif %}
+        </div>
+        {% endif %}
+''' + PAGE_TAIL
+
+STREAM_GRID_OPEN = SECTION_TITLE + '''
+        <!-- Articles Grid -->
+        <div class="articles-grid" id="articles-grid">
 '''
 
+STREAM_TAIL = '''        </div>
+        {% if not total_articles %}
+        <div class="loading">
+            <h3> No articles available right now</h3>
+            <p>Please check back in a few minutes.</p>
+        </div>
+        {% endif %}
+        <script>
+            document.getElementById("stat-articles").dataset.target = "{{ total_articles }}";
+            document.getElementById("stat-sources").dataset.target = "{{ total_sources }}";
+        </script>
+''' + PAGE_TAIL
+
+
+def warm_cache_from_store():
+    """
+    Seed the summary cache from stored LLM summaries that still have their
+    text, then drop the text
+
+    Only stores from before the text was dropped on summarizing have such
+    rows; newer LLM summaries were cached as they were made.
+    """
+    warmed = 0
+    rows = store.final_with_text()
+    while rows:
+        # A duplicate carries its story's summary, not one of its own text.
+        warmed += warm_summary_cache([row for row in rows if row["duplicate_of"] is None])
+        store.drop_text(row["id"] for row in rows)
+        rows = store.final_with_text()
+    if warmed:
+        print(f" Warmed the summary cache with {warmed} stored summaries")
+
+
+def warm_start():
+    """
+    Load the saved snapshot and its page, then start refreshing
+
+    A new worker's first visitor then gets the page from memory, and
+    loading it does not compete with the refresh for the interpreter.
+    """
+    snapshot = refresher.snapshot if WARM_START else None
+    if snapshot is not None:
+        start = time.perf_counter()
+        prerender(snapshot)
+        print(f" Loaded snapshot {snapshot.version} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    warm_cache_from_store()
+    # Off the refresh path: a large store takes minutes, and the articles
+    # refreshes add meanwhile are indexed as usual.
+    threading.Thread(target=backfill_trends, name="trend-backfill", daemon=True).start()
+    if REFRESH_ENABLED:
+        refresher.start()
+
+
+if WARM_START or REFRESH_ENABLED:
+    threading.Thread(target=warm_start, name="warm-start", daemon=True).start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
@@ -0,0 +1,43 @@
+import hashlib
+import mimetypes
+import os
+
+from responses import EncodedBody
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Fingerprinted URLs change whenever the file does, so they can be cached forever.
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class Asset:
+    def __init__(self, name, data):
+        self.name = name
+        stem, ext = os.path.splitext(name)
+        self.fingerprint = hashlib.sha256(data).hexdigest()[:12]
+        self.filename = f"{stem}.{self.fingerprint}{ext}"
+        self.url = f"/assets/{self.filename}"
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.body = EncodedBody(data)
+
+
+def load_assets(directory=STATIC_DIR):
+    assets = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                assets[name] = Asset(name, f.read())
+    return assets
+
+
+_assets = load_assets()
+_by_filename = {asset.filename: asset for asset in _assets.values()}
+
+
+def asset_url(name):
+    """Fingerprinted URL of a file in static/"""
+    return _assets[name].url
+
+
+def find_asset(filename):
+    return _by_filename.get(filename)
@@ -0,0 +1,129 @@
+"""
+Time worker boot and the first page request, cold and from a saved snapshot
+
+    python -m benchmarks.bench_boot [--runs 5]
+
+Each run starts fresh Python processes the way a new gunicorn worker
+starts: one on an empty data directory, whose first visitor waits for the
+first refresh, then one on the snapshot and store that run left behind,
+made older than the refresh interval so a refresh is running while the
+first request is served. Feeds and summaries come from benchmarks.fake_web
+and benchmarks.fake_openai inside each process.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("cold", "snapshot")
+# (metric, label) pairs reported per scenario.
+METRICS = [
+    ("boot", "import app"),
+    ("first_request", "first GET /"),
+    ("second_request", "second GET /"),
+]
+HEAVY_MODULES = ("openai", "bs4", "lxml", "requests", "dateutil")
+
+
+def child(web_latency, llm_latency):
+    """One worker's boot and first requests; prints the timings as JSON"""
+    start = time.perf_counter()
+    import scrapers
+    boot = time.perf_counter() - start
+
+    # The stand-ins are started and the sources pointed at them before the
+    # app is imported, since its refresh starts as the import finishes.
+    from functools import partial
+    from benchmarks.bench_pipeline import bench_feeds
+    from benchmarks.fake_openai import FakeOpenAI
+    from benchmarks.fake_web import FakeWeb
+
+    web = FakeWeb(latency=web_latency).start()
+    fake = FakeOpenAI(latency=llm_latency).start()
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    scrapers.SOURCES = [(feed.name, partial(scrapers.scrape_feed, feed), feed.icon, feed.gradient)
+                        for feed in bench_feeds(web, 7)]
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        start = time.perf_counter()
+        import app
+        boot += time.perf_counter() - start
+        heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+        client = app.app.test_client()
+        start = time.perf_counter()
+        response = client.get("/")
+        response.get_data()
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        client.get("/").get_data()
+        second = time.perf_counter() - start
+        # Let the refresh finish so the next process finds its snapshot.
+        app.refresher.refresh(if_older_than=app.REFRESH_INTERVAL)
+        if app._upgrader is not None:
+            app._upgrader.join()
+    print(json.dumps({"boot": boot, "first_request": first, "second_request": second,
+                      "status": response.status_code, "heavy": heavy}))
+
+
+def run_child(env, args):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_boot", "--child",
+         "--web-latency", str(args.web_latency), "--llm-latency", str(args.llm_latency)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--web-latency", type=float, default=0.05)
+    ap.add_argument("--llm-latency", type=float, default=0.2)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child(args.web_latency, args.llm_latency)
+        return
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {scenario: [] for scenario in SCENARIOS}
+    for _ in range(args.runs):
+        workdir = tempfile.mkdtemp()
+        env = dict(
+            os.environ,
+            PYTHONPATH=root,
+            OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "fake"),
+            SUMMARY_CACHE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+            ARTICLE_STORE_PATH=os.path.join(workdir, "articles.sqlite3"),
+            HTTP_CACHE_DIR=os.path.join(workdir, "http"),
+            SNAPSHOT_PATH=os.path.join(workdir, "snapshot.json"),
+            TREND_INDEX_PATH=os.path.join(workdir, "trends.sqlite3"),
+            POLL_STATE_PATH=os.path.join(workdir, "polling.json"),
+            DEDUPE_WINDOW_DAYS="36500",
+        )
+        results["cold"].append(run_child(env, args))
+        # Every source is due again and the snapshot is past the refresh interval.
+        os.remove(env["POLL_STATE_PATH"])
+        results["snapshot"].append(run_child(dict(env, REFRESH_INTERVAL_SECONDS="1"), args))
+
+    print(f"{args.runs} runs, fake site latency {args.web_latency * 1000:.0f}ms, "
+          f"fake LLM latency {args.llm_latency * 1000:.0f}ms; medians")
+    print(f"{'':<16}" + "".join(f"{scenario:>12}" for scenario in SCENARIOS))
+    for metric, label in METRICS:
+        print(f"{label:<16}" + "".join(
+            f"{statistics.median(run[metric] for run in results[scenario]) * 1000:>10.1f}ms"
+            for scenario in SCENARIOS))
+    heavy = sorted({name for runs in results.values() for run in runs for name in run["heavy"]})
+    print(f"heavy modules imported at boot: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
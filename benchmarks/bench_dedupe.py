@@ -0,0 +1,80 @@
+"""
+Measure how many articles reach the LLM with and without near-duplicate detection
+
+    python -m benchmarks.bench_dedupe [--corpus benchmarks/fixtures/dedupe_corpus.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAI
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, "fixtures", "dedupe_corpus.json")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--latency", type=float, default=0.05)
+    args = ap.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+    stories = len({article["story"] for article in corpus})
+
+    fake = FakeOpenAI(latency=args.latency).start()
+    workdir = tempfile.mkdtemp()
+    os.environ.update(
+        OPENAI_BASE_URL=fake.base_url,
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "fake"),
+        SUMMARY_CACHE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+        ARTICLE_STORE_PATH=os.path.join(workdir, "articles.sqlite3"),
+        SNAPSHOT_PATH=os.path.join(workdir, "snapshot.json"),
+        TREND_INDEX_PATH=os.path.join(workdir, "trends.sqlite3"),
+        POLL_STATE_PATH=os.path.join(workdir, "polling.json"),
+        REFRESH_ENABLED="0",
+    )
+    import app
+    import summarize
+    from dates import parse_timestamp
+    from dedupe import find_duplicates, minhash
+    from summary_cache import SummaryCache
+
+    for article in corpus:
+        article["published"] = parse_timestamp(article["date"])
+    # Created on first use; its import would otherwise be timed as the first mode.
+    summarize.get_client()
+
+    # Without dedupe: every article's text goes to the summarizer.
+    start = time.perf_counter()
+    summarize.summarize_batch([article["text"][:1000] for article in corpus])
+    plain = (fake.items, fake.calls, time.perf_counter() - start)
+
+    # With dedupe: the app's own ingest + summarize path.
+    fake.reset()
+    summarize.summary_cache = SummaryCache(os.path.join(workdir, "dedupe.sqlite3"))
+    start = time.perf_counter()
+    app.store.ingest(corpus)
+    app.summarize_pending(app.store.unsummarized(limit=len(corpus)))
+    app.upgrade_summaries()
+    deduped = (fake.items, fake.calls, time.perf_counter() - start)
+    cards = app.story_cards(app.store.query(limit=len(corpus)))
+
+    signatures = [(i, minhash(a["title"], a["text"])) for i, a in enumerate(corpus)]
+    duplicates = find_duplicates(signatures)
+    wrong = sum(corpus[k]["story"] != corpus[v]["story"] for k, v in duplicates.items())
+    missed = len(corpus) - stories - (len(duplicates) - wrong)
+
+    print(f"{len(corpus)} articles, {stories} distinct stories")
+    print(f"{'mode':<16}{'summarized':>12}{'API calls':>11}{'seconds':>10}")
+    print(f"{'no dedupe':<16}{plain[0]:>12}{plain[1]:>11}{plain[2]:>10.2f}")
+    print(f"{'dedupe':<16}{deduped[0]:>12}{deduped[1]:>11}{deduped[2]:>10.2f}")
+    print(f"{len(cards)} cards rendered; {wrong} false merges, {missed} missed duplicates")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
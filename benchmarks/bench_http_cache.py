@@ -0,0 +1,83 @@
+"""
+Check and time each path through the feed cache against a stand-in site
+
+    python -m benchmarks.bench_http_cache
+
+One HuggingFace-style feed (article bodies fetched separately) is scraped
+four times through a fresh cache: cold while one article page fails, then
+unchanged once that page is back, then with a larger item limit, then
+with the cached body deleted. Each step prints what the cache did and how
+the stand-in answered, and the run exits non-zero if either is not what
+that step should produce.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import bench_feeds
+from benchmarks.fake_web import FakeWeb
+
+# (step, item limit, expected cache result, 304s expected from the site)
+STEPS = [
+    ("cold, one page failing", 3, "fetched", 0),
+    ("unchanged", 3, "not_modified", 1),
+    ("limit changed", 5, "reparsed", 1),
+    ("body missing", 3, "fetched", 1),   # then fetched again without validators
+]
+UNAVAILABLE = ("Content unavailable", "No content available.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--latency", type=float, default=0.02)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.update(
+        HTTP_CACHE_DIR=os.path.join(workdir, "http"),
+        POLL_STATE_PATH=os.path.join(workdir, "polling.json"),
+    )
+    import http_cache
+    import scrapers
+
+    web = FakeWeb(latency=args.latency).start()
+    feed = bench_feeds(web, 1)[0]
+    failing = "/articles/0/0.html"
+    web.failing.add(failing)
+
+    ok = True
+    print(f"{'step':<24}{'cache':>14}{'304s':>6}{'time':>10}  first article")
+    for step, limit, expected, expected_304s in STEPS:
+        if step == "body missing":
+            for path in glob.glob(os.path.join(http_cache.CACHE_DIR, "*.body")):
+                os.remove(path)
+        before = {result: http_cache.LOOKUPS.value(result=result)
+                  for result in ("fetched", "not_modified", "reparsed")}
+        not_modified = web.not_modified
+
+        start = time.perf_counter()
+        articles = scrapers.scrape_feed(feed, limit)
+        elapsed = time.perf_counter() - start
+        web.failing.discard(failing)
+
+        result = next(result for result, count in before.items()
+                      if http_cache.LOOKUPS.value(result=result) > count)
+        answered_304s = web.not_modified - not_modified
+        body = articles[0]["text"]
+        # The failed page only stays unavailable on the step it failed in.
+        body_ok = (body in UNAVAILABLE) == (step == STEPS[0][0])
+        step_ok = result == expected and answered_304s == expected_304s and len(articles) == limit and body_ok
+        ok = ok and step_ok
+        print(f"{step:<24}{result:>14}{answered_304s:>6}{elapsed * 1000:>8.1f}ms  "
+              f"{body[:30]!r}{'' if step_ok else '  MISMATCH'}")
+
+    web.stop()
+    print("all paths as expected" if ok else "unexpected cache behaviour")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure memory and storage per article for a large retained history
+
+    python -m benchmarks.bench_memory [--articles 5000] [--text-chars 4000]
+
+Synthetic articles with --text-chars of body text go through the store
+the way a refresh sends them: ingested, summarized extractively, then
+given their LLM summaries. Cards for all of them are then built as the
+leader builds a snapshot, saved, and loaded back as another worker
+loads it. Memory is measured with tracemalloc.
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_trends import make_articles, vocabulary
+from trends import DAY
+
+
+def traced(function):
+    """(result, bytes still allocated, peak bytes) of calling function"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current, peak
+
+
+def stored_text(store):
+    return store._connect().execute("SELECT COALESCE(SUM(LENGTH(text)), 0) FROM articles").fetchone()[0]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--articles", type=int, default=5000)
+    ap.add_argument("--text-chars", type=int, default=4000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.update(
+        ARTICLE_STORE_PATH=os.path.join(workdir, "articles.sqlite3"),
+        SNAPSHOT_PATH=os.path.join(workdir, "snapshot.json"),
+        TREND_INDEX_PATH=os.path.join(workdir, "trends.sqlite3"),
+        POLL_STATE_PATH=os.path.join(workdir, "polling.json"),
+        SUMMARY_CACHE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+        DASHBOARD_ARTICLES=str(args.articles),
+        REFRESH_ENABLED="0",
+        WARM_START="0",
+    )
+    import app
+    from refresh import Refresher
+    from store import EXTRACTIVE
+
+    rng = random.Random(args.seed)
+    words = vocabulary(20000, rng)
+    articles = make_articles(args.articles, 30, int(time.time()) // DAY, words,
+                             np.random.default_rng(args.seed))
+    names = list(app.SOURCE_STYLES)
+    for article in articles:
+        article["source"] = names[article["id"] % len(names)]
+        article["link"] = f"https://example.com/{article['source'].lower().replace(' ', '-')}/{article['id']}"
+        article["date"] = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(article["published"]))
+        article["text"] = (article["summary"] + " ") * (args.text_chars // len(article["summary"]) + 1)
+        article["text"] = article["text"][:args.text_chars]
+    scraped = sum(len(article["text"]) for article in articles)
+
+    app.store.ingest(articles)
+    after_ingest = stored_text(app.store)
+    app.store.set_summaries(((article["id"], article["summary"][:200]) for article in articles), kind=EXTRACTIVE)
+    app.store.set_summaries((article["id"], article["summary"][:300]) for article in articles)
+    after_llm = stored_text(app.store)
+    del articles
+
+    cards, leader, leader_peak = traced(app.dashboard_cards)
+    path = os.path.join(workdir, "cards.json")
+    Refresher(lambda: cards, path=path).refresh()
+    file_size = os.path.getsize(path)
+    del cards
+    follower = Refresher(None, path=path, load_articles=app.load_cards)
+    snapshot, loaded, loaded_peak = traced(lambda: follower.snapshot)
+
+    n = len(snapshot.articles)
+    print(f"{n} articles, {args.text_chars} characters of scraped text each; bytes per article:")
+    print(f"text scraped               {scraped / n:>8.0f}")
+    print(f"text stored after ingest   {after_ingest / n:>8.0f}")
+    print(f"text stored once final     {after_llm / n:>8.0f}")
+    print(f"card, leader               {leader / n:>8.0f}  (peak while building {leader_peak / n:.0f})")
+    print(f"card in the snapshot file  {file_size / n:>8.0f}")
+    print(f"card, other workers        {loaded / n:>8.0f}  (peak while loading {loaded_peak / n:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Time the scrape -> summarize -> render pipeline against local stand-ins
+
+    python -m benchmarks.bench_pipeline [--feeds 1,3,7] [--limits 3,10]
+    python -m benchmarks.bench_pipeline --save-baseline
+    python -m benchmarks.bench_pipeline --compare benchmarks/baseline.json
+
+Feeds and article pages come from benchmarks.fake_web and summaries from
+benchmarks.fake_openai, so runs are repeatable and need no network. Each
+configuration starts from empty caches and an empty article store, and
+runs --repeat times; the median of each metric is reported, saved and
+compared, so one slow run neither fails a comparison nor skews a
+baseline. A metric regresses when its median is more than --tolerance
+above the baseline's and also slower than every baseline run. Re-record
+the baseline when the machine or the fake latencies change, not to make a
+reported regression go away.
+"""
+import argparse
+import contextlib
+import dataclasses
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fake_web import FakeWeb
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+STAGES = ("fetch", "parse", "date_sort", "summarize", "render")
+# (metric, unit) pairs reported per configuration, all lower-is-better.
+METRICS = [(stage, "s") for stage in STAGES] + [
+    ("end_to_end", "s"),
+    ("page_request", "s"),
+    ("peak_memory", "KiB"),
+]
+
+
+def bench_feeds(web, count):
+    """count registry feeds pointed at the stand-in, cycling the registry if needed"""
+    from feeds import FEEDS
+    feeds = []
+    for i in range(count):
+        feed = FEEDS[i % len(FEEDS)]
+        name = feed.name if i < len(FEEDS) else f"{feed.name} {i // len(FEEDS) + 1}"
+        feeds.append(dataclasses.replace(
+            feed, name=name, urls=(web.feed_url(i, atom=feed.item_tag == "entry"),), topic_urls=()))
+    return feeds
+
+
+def reset_state(workdir, run):
+    """Point every cache and store at fresh files so each run starts cold"""
+    import app
+    import http_cache
+    import scrapers
+    import summarize
+    from polling import PollSchedule
+    from ratelimit import RateLimiter
+    from refresh import Refresher
+    from store import ArticleStore
+    from summary_cache import SummaryCache
+    from trends import TrendIndex
+
+    http_cache.default_cache = http_cache.HTTPCache(os.path.join(workdir, f"http-{run}"))
+    summarize.summary_cache = SummaryCache(os.path.join(workdir, f"summaries-{run}.sqlite3"))
+    app.summary_cache = summarize.summary_cache
+    # A full budget too: repeated runs would otherwise drain the per-minute token bucket.
+    summarize.rate_limiter = RateLimiter(summarize.rate_limiter.requests.capacity,
+                                         summarize.rate_limiter.tokens.capacity)
+    app.store = ArticleStore(os.path.join(workdir, f"articles-{run}.sqlite3"))
+    app.trend_index = TrendIndex(os.path.join(workdir, f"trends-{run}.sqlite3"))
+    scrapers.poll_schedule = PollSchedule(os.path.join(workdir, f"polling-{run}.json"))
+    app.refresher = Refresher(app.build_articles, interval=app.REFRESH_INTERVAL, on_snapshot=app.prerender)
+    app._page_cache = None
+    app._api_cache.clear()
+
+
+def run_stages(feeds, limit):
+    """Walk the refresh path one stage at a time, returning seconds per stage"""
+    import app
+    import http_client
+    import scrapers
+    from feeds import parse_feed
+    from refresh import Snapshot
+
+    timings = {}
+    urls = [feed.urls[0].replace("{limit}", str(limit)) for feed in feeds]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(feeds)) as executor:
+        bodies = list(executor.map(lambda url: http_client.get(url).content, urls))
+    timings["fetch"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = [parse_feed(body, feed, url, limit) for body, feed, url in zip(bodies, feeds, urls)]
+    timings["parse"] = time.perf_counter() - start
+
+    # Article pages are part of fetching, even though they need the parsed links.
+    start = time.perf_counter()
+    for feed, items in zip(feeds, parsed):
+        if feed.fetch_body:
+            scrapers._fetch_bodies(items)
+    timings["fetch"] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    articles = []
+    for feed, items in zip(feeds, parsed):
+        articles.extend(scrapers._tag_articles(items, feed.name))
+    articles.sort(key=lambda x: x["published"], reverse=True)
+    timings["date_sort"] = time.perf_counter() - start
+
+    # Extractive summaries plus the LLM upgrade the app runs in the background.
+    start = time.perf_counter()
+    app.store.ingest(articles)
+    pending = app.store.unsummarized(limit=app.SUMMARY_BACKLOG_LIMIT)
+    app.summarize_pending(pending)
+    app.index_trends(pending)
+    app.upgrade_summaries()
+    timings["summarize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cards = app.story_cards(app.store.query(limit=app.DASHBOARD_ARTICLES))
+    snapshot = Snapshot(articles=cards, version=1, created_at=time.time(), duration=0)
+    with app.app.test_request_context("/"):
+        app.render_page(snapshot)
+    timings["render"] = time.perf_counter() - start
+    return timings
+
+
+def wait_for_upgrade():
+    import app
+    if app._upgrader is not None:
+        app._upgrader.join()
+
+
+def run_end_to_end(requests=20):
+    """
+    Cold refresh plus the first page view, then the median of later page
+    views; the LLM summaries arrive after the first view
+    """
+    import app
+    client = app.app.test_client()
+    start = time.perf_counter()
+    app.refresher.refresh()
+    response = client.get("/")
+    assert response.status_code == 200, response.status_code
+    total = time.perf_counter() - start
+
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get("/", headers={"Accept-Encoding": "gzip"})
+        samples.append(time.perf_counter() - start)
+    return total, statistics.median(samples)
+
+
+def bench(web, fake, workdir, count, limit, run=0):
+    import app
+    import scrapers
+
+    feeds = bench_feeds(web, count)
+    scrapers.SOURCES = [(feed.name, partial(scrapers.scrape_feed, feed), feed.icon, feed.gradient)
+                        for feed in feeds]
+    app.SOURCE_STYLES = {feed.name: (feed.icon, feed.gradient) for feed in feeds}
+    app.LIMIT_PER_SOURCE = limit
+    app.DASHBOARD_ARTICLES = limit * count
+    key = f"{count}x{limit}"
+
+    reset_state(workdir, f"{key}-{run}-stages")
+    # Like timeit, stages run with the collector paused: otherwise a full
+    # collection lands in whichever stage happens to cross the threshold.
+    gc.collect()
+    gc.disable()
+    try:
+        result = run_stages(feeds, limit)
+    finally:
+        gc.enable()
+
+    reset_state(workdir, f"{key}-{run}-e2e")
+    web.reset()
+    fake.reset()
+    result["end_to_end"], result["page_request"] = run_end_to_end()
+    wait_for_upgrade()
+    result["http_requests"] = web.requests
+    result["llm_calls"] = fake.calls
+
+    # Traced separately: tracemalloc slows allocation-heavy code too much to time under it.
+    reset_state(workdir, f"{key}-{run}-memory")
+    gc.collect()
+    tracemalloc.start()
+    try:
+        app.refresher.refresh()
+        app.app.test_client().get("/")
+        wait_for_upgrade()
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return key, result
+
+
+def median_result(runs):
+    """Each metric's median over repeated runs of one configuration, and its slowest run"""
+    result = {metric: statistics.median(run[metric] for run in runs) for metric, _ in METRICS}
+    result["slowest"] = {metric: max(run[metric] for run in runs) for metric, _ in METRICS}
+    # Counts, not timings: every run should agree, so report the last.
+    result["http_requests"] = runs[-1]["http_requests"]
+    result["llm_calls"] = runs[-1]["llm_calls"]
+    return result
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Regressions of median results against a baseline as (config, metric, baseline, current) tuples"""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        for metric, unit in METRICS:
+            if metric not in old or metric not in result:
+                continue
+            before, now = old[metric], result[metric]
+            # Sub-millisecond stages are mostly noise; only flag real slowdowns.
+            floor = min_seconds if unit == "s" else 0
+            # A median within the baseline's own spread is the machine, not the code.
+            slowest = old.get("slowest", {}).get(metric, before)
+            if now > before * (1 + tolerance) and now > slowest and now - before > floor:
+                regressions.append((key, metric, before, now))
+    return regressions
+
+
+def print_table(results, baseline=None):
+    header = f"{'config':<8}" + "".join(f"{metric:>13}" for metric, _ in METRICS) + f"{'requests':>10}{'LLM calls':>11}"
+    print(header)
+    for key, result in results.items():
+        cells = []
+        for metric, unit in METRICS:
+            value = result[metric]
+            cells.append(f"{value:>12.0f}K" if unit == "KiB" else f"{value * 1000:>11.1f}ms")
+        print(f"{key:<8}" + "".join(cells) + f"{result['http_requests']:>10}{result['llm_calls']:>11}")
+        old = (baseline or {}).get("results", {}).get(key)
+        if old:
+            deltas = []
+            for metric, _ in METRICS:
+                if old.get(metric):
+                    deltas.append(f"{(result[metric] / old[metric] - 1) * 100:>+12.0f}%")
+                else:
+                    deltas.append(f"{'-':>13}")
+            print(f"{'  vs base':<8}" + "".join(deltas))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--feeds", default="1,3,7", help="comma-separated feed counts")
+    ap.add_argument("--limits", default="3,10", help="comma-separated limit_per_source values")
+    ap.add_argument("--web-latency", type=float, default=0.02, help="seconds per fake site request")
+    ap.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake API call")
+    ap.add_argument("--compare", metavar="BASELINE", nargs="?", const=DEFAULT_BASELINE,
+                    help="compare against a baseline (default benchmarks/baseline.json)")
+    ap.add_argument("--save-baseline", metavar="PATH", nargs="?", const=DEFAULT_BASELINE,
+                    help="write these results as the new baseline")
+    ap.add_argument("--repeat", type=int, default=5, help="runs per configuration; medians are compared")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    ap.add_argument("--min-seconds", type=float, default=0.005,
+                    help="ignore timing differences smaller than this")
+    ap.add_argument("--verbose", action="store_true", help="show the pipeline's own progress output")
+    args = ap.parse_args()
+
+    web = FakeWeb(latency=args.web_latency).start()
+    fake = FakeOpenAI(latency=args.llm_latency).start()
+    workdir = tempfile.mkdtemp()
+    os.environ.update(
+        OPENAI_BASE_URL=fake.base_url,
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "fake"),
+        SUMMARY_CACHE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+        ARTICLE_STORE_PATH=os.path.join(workdir, "articles.sqlite3"),
+        HTTP_CACHE_DIR=os.path.join(workdir, "http"),
+        SNAPSHOT_PATH=os.path.join(workdir, "snapshot.json"),
+        TREND_INDEX_PATH=os.path.join(workdir, "trends.sqlite3"),
+        POLL_STATE_PATH=os.path.join(workdir, "polling.json"),
+        REFRESH_ENABLED="0",
+    )
+    # The fixture dates are fixed, so widen the dedupe window to cover them.
+    os.environ.setdefault("DEDUPE_WINDOW_DAYS", "36500")
+
+    # The app imports these on first use; a running worker has paid for that long before.
+    import http_client
+    import summarize
+    from lxml import etree
+    http_client.get_session()
+    summarize.get_client()
+
+    results = {}
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            for count in (int(n) for n in args.feeds.split(",")):
+                for limit in (int(n) for n in args.limits.split(",")):
+                    runs = [bench(web, fake, workdir, count, limit, run) for run in range(args.repeat)]
+                    results[runs[0][0]] = median_result([result for _, result in runs])
+    finally:
+        web.stop()
+        fake.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"fake site latency {args.web_latency * 1000:.0f}ms, fake LLM latency {args.llm_latency * 1000:.0f}ms, "
+          f"median of {args.repeat} runs")
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "web_latency": args.web_latency,
+                "llm_latency": args.llm_latency,
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.save_baseline}")
+
+    if baseline:
+        if (baseline.get("web_latency"), baseline.get("llm_latency")) != (args.web_latency, args.llm_latency):
+            print("warning: baseline was recorded with different fake latencies")
+        if baseline.get("repeat", 1) != args.repeat:
+            print(f"warning: baseline is the median of {baseline.get('repeat', 1)} runs, not {args.repeat}")
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        for key, metric, before, now in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.4f} -> {now:.4f}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time full-text search queries against a large synthetic article store
+
+    python -m benchmarks.bench_search [--articles 300000]
+
+Articles come from benchmarks.bench_trends' Zipf vocabulary, so some
+search words match a handful of articles and others a large share of
+them; the most common ones behave like stopwords, being in nearly every
+article. Each query is run a few times and the median reported.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_trends import SOURCES, make_articles, vocabulary
+from store import ArticleStore, search_query
+from trends import DAY
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--articles", type=int, default=300000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    generator = np.random.default_rng(args.seed)
+    words = vocabulary(20000, rng)
+    now = time.time()
+    end = int(now) // DAY
+
+    store = ArticleStore(os.path.join(tempfile.mkdtemp(), "articles.sqlite3"))
+    start = time.perf_counter()
+    for i in range(0, args.articles, 10000):
+        batch = make_articles(min(10000, args.articles - i), args.days, end, words, generator, start_id=i)
+        for article in batch:
+            article["link"] = f"https://example.com/{article['id']}"
+            article["text"] = article["summary"]
+        store.ingest(batch)
+        store.set_summaries((article_id + 1, article["summary"]) for article_id, article in enumerate(batch, i))
+    indexing = time.perf_counter() - start
+
+    # One new refresh's worth of articles through the same path.
+    batch = make_articles(21, 1, end, words, generator, start_id=args.articles)
+    for article in batch:
+        article["link"] = f"https://example.com/{article['id']}"
+    start = time.perf_counter()
+    store.ingest(batch)
+    incremental = time.perf_counter() - start
+
+    common, medium, rare = words[0], words[200], words[5000]
+    queries = [
+        ("rare word", dict(query=search_query(rare))),
+        ("medium word", dict(query=search_query(medium))),
+        ("frequent word", dict(query=search_query(words[20]))),
+        ("two words", dict(query=search_query(f"{medium} {words[300]}"))),
+        ("phrase", dict(query=search_query(f'"{words[20]} {words[30]}"'))),
+        ("stopword-like", dict(query=search_query(common))),
+        ("stopword phrase", dict(query=search_query(f'"{words[1]} {words[2]}"'))),
+        ("prefix", dict(query=search_query(words[100][:3] + "*"))),
+        ("medium + source", dict(query=search_query(medium), source=SOURCES[1])),
+        ("medium + 30 days", dict(query=search_query(medium), since=now - 30 * DAY)),
+        ("frequent by date", dict(query=search_query(words[20]), order="date")),
+        ("frequent, page 5", dict(query=search_query(words[20]), offset=80)),
+    ]
+
+    print(f"{store.count()} articles indexed in {indexing:.1f} s; "
+          f"ingesting 21 more took {incremental * 1000:.1f} ms")
+    print(f"{'query':<18}{'matches':>9}{'median':>10}")
+    for name, kwargs in queries:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            store.search(limit=20, **kwargs)
+            samples.append(time.perf_counter() - start)
+        matches = store._connect().execute(
+            "SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH ?", (kwargs["query"],)).fetchone()[0]
+        print(f"{name:<18}{matches:>9}{statistics.median(samples) * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare per-article and batched summarization against a fake endpoint
+
+    python -m benchmarks.bench_summarize --articles 21 --latency 0.3
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAI
+
+WORDS = ("model agents training inference benchmark dataset open source release "
+         "transformer research safety policy startup funding chip compute").split()
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 180))) + f" #{i}"
+            for i in range(count)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--articles", type=int, default=21)
+    ap.add_argument("--latency", type=float, default=0.3, help="seconds per fake API call")
+    ap.add_argument("--token-budget", type=int, default=None)
+    ap.add_argument("--malformed-every", type=int, default=0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    ap.add_argument("--concurrency", type=int, default=None)
+    args = ap.parse_args()
+
+    fake = FakeOpenAI(latency=args.latency, malformed_every=args.malformed_every,
+                      error_rate=args.error_rate).start()
+    cache_dir = tempfile.mkdtemp()
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["SUMMARY_CACHE_PATH"] = os.path.join(cache_dir, "single.sqlite3")
+    import summarize
+    from summary_cache import SummaryCache
+
+    texts = make_texts(args.articles)
+    rows = []
+    # Created on first use; its import would otherwise be timed as the first mode.
+    summarize.get_client()
+
+    start = time.perf_counter()
+    for text in texts:
+        summarize.summarize_text(text)
+    rows.append(("per-article", fake.calls, time.perf_counter() - start))
+
+    fake.reset()
+    summarize.summary_cache = SummaryCache(os.path.join(cache_dir, "batch.sqlite3"))
+    start = time.perf_counter()
+    results = summarize.summarize_batch(texts, token_budget=args.token_budget, concurrency=1)
+    rows.append(("batched", fake.calls, time.perf_counter() - start))
+    missing = sum(r is None for r in results)
+
+    fake.reset()
+    summarize.summary_cache = SummaryCache(os.path.join(cache_dir, "concurrent.sqlite3"))
+    start = time.perf_counter()
+    results = summarize.summarize_batch(texts, token_budget=args.token_budget, concurrency=args.concurrency)
+    rows.append(("batched, concurrent", fake.calls, time.perf_counter() - start))
+    missing += sum(r is None for r in results)
+
+    fake.reset()
+    start = time.perf_counter()
+    summarize.summarize_batch(texts, token_budget=args.token_budget)
+    rows.append(("batched, warm cache", fake.calls, time.perf_counter() - start))
+
+    print(f"{args.articles} articles, {args.latency:.2f}s per call")
+    print(f"{'mode':<22}{'calls':>8}{'seconds':>10}")
+    for mode, calls, seconds in rows:
+        print(f"{mode:<22}{calls:>8}{seconds:>10.2f}")
+    if args.error_rate:
+        print("calls answered with 429 are included in the counts")
+    if missing:
+        print(f"{missing} articles left without a summary")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
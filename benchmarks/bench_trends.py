@@ -0,0 +1,128 @@
+"""
+Time the trend index on a large synthetic history
+
+    python -m benchmarks.bench_trends [--articles 100000] [--days 365]
+
+Titles and summaries are drawn from a Zipf-distributed vocabulary, spread
+over --days days and seven sources, with one phrase made to spike on the
+last day so the result can be checked as well as timed. A second index on
+the same database stands in for another worker, and its read after the
+adds is checked against a full load.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from trends import DAY, TrendIndex
+
+SOURCES = ["HuggingFace", "arXiv", "TechCrunch", "OpenAI", "MIT News", "VentureBeat", "Towards DS"]
+SPIKE = "quantum agents"
+
+
+def vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def make_articles(count, days, end, words, generator, start_id=1):
+    """Articles with 40 Zipf-distributed words each, published over the last days days"""
+    picks = np.minimum(generator.zipf(1.3, size=(count, 40)), len(words)) - 1
+    day = end - generator.integers(0, days, size=count)
+    published = day * DAY + generator.integers(0, DAY, size=count)
+    sources = generator.integers(0, len(SOURCES), size=count)
+    articles = []
+    for i in range(count):
+        text = [words[j] for j in picks[i]]
+        articles.append({
+            "id": start_id + i,
+            "source": SOURCES[sources[i]],
+            "published": int(published[i]),
+            "title": " ".join(text[:8]),
+            "summary": " ".join(text[8:]),
+        })
+    return articles
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--articles", type=int, default=100000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--vocabulary", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    generator = np.random.default_rng(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    now = time.time()
+    end = int(now) // DAY
+
+    history = make_articles(args.articles, args.days, end, words, generator)
+    for article in history[-40:]:
+        article["published"] = end * DAY
+        article["title"] = f"{SPIKE} {article['title']}"
+
+    index = TrendIndex(os.path.join(tempfile.mkdtemp(), "trends.sqlite3"))
+    start = time.perf_counter()
+    for i in range(0, len(history), 5000):
+        index.add(history[i:i + 5000], now=now)
+    backfill = time.perf_counter() - start
+
+    # A fresh process: the first read loads the window from SQLite.
+    index = TrendIndex(index.path)
+    start = time.perf_counter()
+    result = index.rising(now=now)
+    cold = time.perf_counter() - start
+
+    samples = []
+    for _ in range(20):
+        index._cache.clear()
+        start = time.perf_counter()
+        index.rising(now=now)
+        samples.append(time.perf_counter() - start)
+
+    # Another worker with the window loaded, which only sees the adds below through SQLite.
+    follower = TrendIndex(index.path)
+    follower.rising(now=now)
+
+    # One refresh's worth of new articles, then a summary upgrade of the same ones.
+    new = make_articles(21, 1, end, words, generator, start_id=len(history) + 1)
+    start = time.perf_counter()
+    index.add(new, now=now)
+    incremental = time.perf_counter() - start
+    for article, upgraded in zip(new, make_articles(21, 1, end, words, generator)):
+        article["summary"] = upgraded["summary"]
+    start = time.perf_counter()
+    index.add(new, now=now)
+    upgrade = time.perf_counter() - start
+    start = time.perf_counter()
+    index.rising(now=now)
+    after_add = time.perf_counter() - start
+    start = time.perf_counter()
+    caught_up = follower.rising(now=now)
+    catch_up = time.perf_counter() - start
+    matches = caught_up == TrendIndex(index.path).rising(now=now)
+
+    window = index._counts
+    print(f"{len(history)} articles over {args.days} days, "
+          f"{len(index._term_names)} terms in the {index.baseline_days + 1}-day window "
+          f"({window.nbytes / 1024 / 1024:.1f} MiB)")
+    print(f"backfill              {backfill:>9.2f} s  ({backfill / len(history) * 1e6:.0f} us per article)")
+    print(f"rising, cold load     {cold * 1000:>9.1f} ms")
+    print(f"rising, computed      {statistics.median(samples) * 1000:>9.1f} ms")
+    print(f"add 21 new articles   {incremental * 1000:>9.1f} ms")
+    print(f"re-add 21 upgraded    {upgrade * 1000:>9.1f} ms")
+    print(f"rising after add      {after_add * 1000:>9.1f} ms")
+    print(f"rising, other worker  {catch_up * 1000:>9.1f} ms  "
+          f"({'matches a full load' if matches else 'DIFFERS from a full load'})")
+    top = [trend["term"] for trend in result["terms"][:3]]
+    print(f"top rising: {', '.join(top)}  ({'ok' if SPIKE in top else 'spike not found'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Local stand-in for the OpenAI chat completions API"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAI:
+    """
+    Serve /v1/chat/completions on localhost with a fixed latency
+
+    Batched (JSON mode) prompts get one summary per id; malformed_every=N
+    makes every Nth batched reply unparseable to exercise the fallback, and
+    error_rate answers that fraction of calls with a 429.
+    """
+
+    def __init__(self, latency=0.2, malformed_every=0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.malformed_every = malformed_every
+        self.error_rate = error_rate
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.items = 0
+        self.batched_calls = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, reply = fake.complete(body)
+                data = json.dumps(reply).encode("utf-8")
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0.1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.items = self.batched_calls = self.prompt_tokens = self.rate_limited = 0
+
+    def complete(self, body):
+        prompt = body["messages"][-1]["content"]
+        batched = (body.get("response_format") or {}).get("type") == "json_object"
+        with self._lock:
+            self.calls += 1
+            if self._random.random() < self.error_rate:
+                self.rate_limited += 1
+                return 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            self.batched_calls += batched
+            self.prompt_tokens += len(prompt) // 4
+            call_number = self.batched_calls
+        time.sleep(self.latency)
+
+        if batched:
+            items = json.loads(prompt.split("\n\n", 1)[1])
+            with self._lock:
+                self.items += len(items)
+            if self.malformed_every and call_number % self.malformed_every == 0:
+                content = '{"summaries": [ truncated'
+            else:
+                content = json.dumps({"summaries": [
+                    {"id": item["id"], "summary": _bullets(item["text"])} for item in items
+                ]})
+        else:
+            with self._lock:
+                self.items += 1
+            content = _bullets(prompt.split("\n\n", 1)[-1])
+
+        return 200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40, "total_tokens": len(prompt) // 4 + 40},
+        }
+
+
+def _bullets(text):
+    words = text.split()
+    return "\n".join(f"- {' '.join(words[i:i + 8])}" for i in range(0, min(len(words), 24), 8)) or "- (empty)"
@@ -0,0 +1,171 @@
+"""Local stand-in for the news sites: RSS/Atom feeds and article pages"""
+import random
+import threading
+import time
+import zlib
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+WORDS = ("model agents training inference benchmark dataset open source release "
+         "transformer research safety policy startup funding chip compute robotics "
+         "vision language reasoning evaluation alignment deployment cloud").split()
+
+# Fixed "now" so every run serves the same documents.
+EPOCH = 1735689600  # 2025-01-01T00:00:00Z
+
+
+class FakeWeb:
+    """
+    Serve generated feeds and article pages on localhost
+
+    /feeds/<n>.rss and /feeds/<n>.atom hold items newest first, shaped like
+    the real sources (atom:link and CDATA descriptions in RSS, namespaced
+    Atom entries); each item links to /articles/<n>/<i>.html. Every
+    response waits latency seconds and carries an ETag; a request whose
+    If-None-Match matches it gets an empty 304. Paths added to failing
+    answer 503 until they are removed.
+    """
+
+    def __init__(self, items_per_feed=50, paragraphs=12, latency=0.05, seed=0):
+        self.items_per_feed = items_per_feed
+        self.paragraphs = paragraphs
+        self.latency = latency
+        self.seed = seed
+        self.requests = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self.failing = set()
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_url(self, number, atom=False):
+        return f"{self.base_url}/feeds/{number}.{'atom' if atom else 'rss'}"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, content_type, data, etag = fake.get(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                if status != 304:
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.bytes_sent = self.not_modified = 0
+
+    def get(self, path, if_none_match=None):
+        """(status, content type, body, ETag) for a GET of path"""
+        time.sleep(self.latency)
+        if path in self.failing:
+            return 503, "text/plain", b"unavailable", None
+        with self._lock:
+            data = self._documents.get(path)
+        if data is None:
+            data = self._render(path)
+            if data is not None:
+                with self._lock:
+                    self._documents[path] = data
+        if data is None:
+            return 404, "text/plain", b"not found", None
+        etag = f'"{zlib.crc32(data):08x}"'
+        content_type = "application/xml" if path.startswith("/feeds/") else "text/html; charset=utf-8"
+        with self._lock:
+            self.requests += 1
+            if if_none_match == etag:
+                self.not_modified += 1
+                return 304, content_type, b"", etag
+            self.bytes_sent += len(data)
+        return 200, content_type, data, etag
+
+    def _render(self, path):
+        parts = path.strip("/").split("/")
+        try:
+            if parts[0] == "feeds" and len(parts) == 2:
+                number, kind = parts[1].split(".")
+                return self._feed(int(number), kind == "atom").encode("utf-8")
+            if parts[0] == "articles" and len(parts) == 3:
+                return self._article(int(parts[1]), int(parts[2].split(".")[0])).encode("utf-8")
+        except ValueError:
+            return None
+        return None
+
+    def _words(self, rng, low, high):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    def _items(self, number):
+        rng = random.Random(self.seed * 1000 + number)
+        published = EPOCH - rng.randint(0, 3600)
+        for i in range(self.items_per_feed):
+            published -= rng.randint(600, 6 * 3600)
+            yield {
+                "title": f"AI {self._words(rng, 4, 9)} ({number}-{i})",
+                "link": f"{self.base_url}/articles/{number}/{i}.html",
+                "text": self._words(rng, 30, 60),
+                "published": datetime.fromtimestamp(published, timezone.utc),
+            }
+
+    def _feed(self, number, atom):
+        if atom:
+            entries = "".join(
+                "<entry>"
+                f"<id>{item['link']}</id><title>{escape(item['title'])}</title>"
+                f"<published>{item['published'].strftime('%Y-%m-%dT%H:%M:%SZ')}</published>"
+                f"<summary>{escape(item['text'])}</summary>"
+                '<author><name>Fixture Author</name></author>'
+                "</entry>"
+                for item in self._items(number)
+            )
+            return ('<?xml version="1.0" encoding="UTF-8"?>'
+                    '<feed xmlns="http://www.w3.org/2005/Atom">'
+                    f"<title>Feed {number}</title>{entries}</feed>")
+        items = "".join(
+            "<item>"
+            f"<title>{escape(item['title'])}</title><link>{item['link']}</link>"
+            f"<pubDate>{format_datetime(item['published'])}</pubDate>"
+            f"<description><![CDATA[<p>{item['text']}</p>]]></description>"
+            f"<guid isPermaLink=\"true\">{item['link']}</guid>"
+            "</item>"
+            for item in self._items(number)
+        )
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+                f"<title>Feed {number}</title>"
+                f'<atom:link href="{self.feed_url(number)}" rel="self"/>'
+                f"{items}</channel></rss>")
+
+    def _article(self, number, index):
+        rng = random.Random((self.seed * 1000 + number) * 100000 + index)
+        nav = "".join(f'<li><a href="/section/{i}">{rng.choice(WORDS)}</a></li>' for i in range(40))
+        paragraphs = "".join(f"<p>{self._words(rng, 40, 90)}.</p>" for _ in range(self.paragraphs))
+        return ("<!DOCTYPE html><html><head><title>Article</title>"
+                f"<style>{'body{margin:0}' * 200}</style></head>"
+                f"<body><nav><ul>{nav}</ul></nav><article>{paragraphs}</article>"
+                f"<footer>{'<p>Footer link</p>' * 5}</footer></body></html>")
@@ -0,0 +1,58 @@
+import calendar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+def _to_epoch(dt):
+    # Feeds without a zone are taken to be UTC.
+    if dt.tzinfo is None:
+        return calendar.timegm(dt.timetuple())
+    return int(dt.timestamp())
+
+
+def parse_timestamp(date_str):
+    """
+    UTC epoch seconds for a feed date, or 0 if it cannot be parsed
+
+    RFC 822 (RSS) and ISO 8601 (Atom) dates take a fast path; anything else
+    falls back to dateutil.
+    """
+    if not date_str:
+        return 0
+    date_str = date_str.strip()
+    if date_str[:1].isdigit():
+        try:
+            return _to_epoch(datetime.fromisoformat(date_str))
+        except ValueError:
+            pass
+    else:
+        try:
+            return _to_epoch(parsedate_to_datetime(date_str))
+        except (TypeError, ValueError, IndexError):
+            pass
+    try:
+        from dateutil import parser
+        return _to_epoch(parser.parse(date_str))
+    except (ValueError, OverflowError, TypeError):
+        return 0
+
+
+@lru_cache(maxsize=8192)
+def format_timestamp(timestamp):
+    """Display form of an epoch timestamp, e.g. "January 5th, 2024 – 3:04 PM" (UTC)"""
+    dt = datetime.fromtimestamp(timestamp, timezone.utc)
+    day = dt.day
+    if 4 <= day <= 20 or 24 <= day <= 30:
+        suffix = "th"
+    else:
+        suffix = ["st", "nd", "rd"][day % 10 - 1]
+    formatted = dt.strftime(f"%B {day}{suffix}, %Y")
+    if dt.hour or dt.minute:
+        formatted += " – " + dt.strftime("%I:%M %p").lstrip("0")
+    return formatted
+
+
+def format_date(timestamp, date_str=None):
+    """Formatted timestamp, or the raw feed string when it could not be parsed"""
+    return format_timestamp(timestamp) if timestamp else (date_str or "Unknown date")
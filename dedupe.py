@@ -0,0 +1,114 @@
+import hashlib
+import random
+import re
+from array import array
+
+# Estimated Jaccard similarity at or above which two stories are the same.
+THRESHOLD = 0.5
+NUM_PERM = 64
+BANDS = 16          # 16 bands of 4 rows: pairs around the threshold usually collide
+SHINGLE_SIZE = 2
+TEXT_WORDS = 150
+
+_WORD = re.compile(r"[a-z0-9]+")
+_TAG = re.compile(r"<[^>]+>")
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(title, text=""):
+    """Word pairs of the title followed by the start of the text"""
+    words = _WORD.findall(title.lower())
+    words += _WORD.findall(_TAG.sub(" ", text or "").lower())[:TEXT_WORDS]
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title, text=""):
+    """MinHash signature (NUM_PERM values) of a story's shingles"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big")
+        for s in shingles(title, text)
+    ]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(min((a * h + b) % _PRIME & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def pack(signature):
+    return array("I", signature).tobytes()
+
+
+def unpack(data):
+    return tuple(array("I", data))
+
+
+class MinHashIndex:
+    """
+    LSH index over MinHash signatures
+
+    Signatures are cut into bands; only entries that agree on a whole band
+    are compared, so lookups stay cheap as the index grows.
+    """
+
+    def __init__(self, threshold=THRESHOLD, bands=BANDS):
+        self.threshold = threshold
+        self.rows = NUM_PERM // bands
+        self._tables = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def _bands(self, signature):
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(len(self._tables))]
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for table, band in zip(self._tables, self._bands(signature)):
+            table.setdefault(band, []).append(key)
+
+    def find(self, signature):
+        """Most similar indexed key at or above the threshold, or None"""
+        best, best_score = None, self.threshold
+        seen = set()
+        for table, band in zip(self._tables, self._bands(signature)):
+            for key in table.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = similarity(signature, self._signatures[key])
+                if score >= best_score:
+                    best, best_score = key, score
+        return best
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+def find_duplicates(items, known=(), threshold=THRESHOLD):
+    """
+    Map each near-duplicate item to the story it repeats
+
+    items and known are (key, signature) pairs; known stories (e.g. already
+    summarized ones) are matched against but never reported. Returns
+    {key: canonical_key} for items that repeat a known story or an earlier
+    item.
+    """
+    index = MinHashIndex(threshold)
+    for key, signature in known:
+        index.add(key, signature)
+    duplicates = {}
+    for key, signature in items:
+        match = index.find(signature)
+        if match is not None:
+            duplicates[key] = duplicates.get(match, match)
+        else:
+            index.add(key, signature)
+    return duplicates
@@ -0,0 +1,95 @@
+import html
+import re
+
+import numpy as np
+
+BULLETS = 3
+MAX_SENTENCES = 80
+MAX_BULLET_CHARS = 220
+DAMPING = 0.85
+
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+# A sentence ends at . ! or ? followed by whitespace and something that can start one.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an the and or but if of to in on for with without by at as from into about over "
+    "is are was were be been being has have had do does did not no it its this that these "
+    "those there their they them we our you your he she his her i me my can will would "
+    "could should may might also more most than then so such which who what when where how".split()
+)
+
+
+def clean_text(text):
+    """Feed or page text without markup, entities or runs of whitespace"""
+    return _SPACE.sub(" ", html.unescape(_TAG.sub(" ", text or ""))).strip()
+
+
+def split_sentences(text):
+    sentences = [s.strip() for s in _SENTENCE_END.split(clean_text(text))]
+    return [s for s in sentences if len(_WORD.findall(s.lower())) >= 3]
+
+
+def tfidf_matrix(sentences):
+    """L2-normalised TF-IDF rows, one per sentence, with the sentences as the corpus"""
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    counts = np.zeros((len(sentences), max(1, len(vocabulary))))
+    np.add.at(counts, (rows, cols), 1)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = counts * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1, norms)
+
+
+def textrank(weights, damping=DAMPING, iterations=50, tolerance=1e-6):
+    """PageRank over the cosine-similarity graph of the sentences"""
+    n = weights.shape[0]
+    similarity = weights @ weights.T
+    np.fill_diagonal(similarity, 0)
+    totals = similarity.sum(axis=1, keepdims=True)
+    # A sentence sharing no words with the others links to every sentence equally.
+    transition = np.where(totals > 0, similarity / np.where(totals == 0, 1, totals), 1 / n)
+    scores = np.full(n, 1 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def _shorten(sentence):
+    if len(sentence) <= MAX_BULLET_CHARS:
+        return sentence
+    return sentence[:MAX_BULLET_CHARS].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def summarize(text, bullets=BULLETS):
+    """
+    The most central sentences of a text as "- " bullets, in their original
+    order, or None if the text is empty
+
+    Runs locally in milliseconds, so every article has a summary before the
+    LLM answers, or when it never does.
+    """
+    sentences = split_sentences(text)[:MAX_SENTENCES]
+    if not sentences:
+        # Too short to split (e.g. a one-line description): use it whole.
+        sentences = [clean_text(text)] if clean_text(text) else []
+    if not sentences:
+        return None
+    if len(sentences) > bullets:
+        scores = textrank(tfidf_matrix(sentences))
+        # Stable sort so ties go to the earlier sentence.
+        picked = sorted(np.argsort(-scores, kind="stable")[:bullets])
+        sentences = [sentences[i] for i in picked]
+    return "\n".join(f"- {_shorten(sentence)}" for sentence in sentences)
@@ -0,0 +1,162 @@
+from dataclasses import dataclass, field
+from io import BytesIO
+
+RSS_FIELDS = {"title": "title", "link": "link", "text": "description", "date": "pubDate"}
+ATOM_FIELDS = {"title": "title", "link": "id", "text": "summary", "date": "published"}
+
+DEFAULTS = {
+    "title": "No title",
+    "link": "#",
+    "text": "No description available.",
+    "date": "Unknown date",
+}
+
+AI_KEYWORDS = ("ai", "artificial intelligence", "machine learning", "deep learning")
+
+
+@dataclass(frozen=True)
+class Feed:
+    """
+    One news source and how to read it
+
+    urls are tried in order until one yields items; "{limit}" in a URL is
+    replaced with the item limit. keywords, when set, keep only items whose
+    title contains one of them, except on the URLs listed in topic_urls,
+    which are already restricted to the topic.
+    """
+    name: str
+    urls: tuple
+    icon: str
+    gradient: str
+    item_tag: str = "item"
+    fields: dict = field(default_factory=lambda: RSS_FIELDS)
+    headers: dict = None
+    keywords: tuple = ()
+    topic_urls: tuple = ()
+    timeout: tuple = None       # (connect, read); None uses http_client's defaults
+    fetch_body: bool = False
+    defaults: dict = field(default_factory=dict)
+
+    def matches(self, url, title):
+        if not self.keywords or url in self.topic_urls:
+            return True
+        title = title.lower()
+        return any(keyword in title for keyword in self.keywords)
+
+
+FEEDS = [
+    Feed(
+        name="HuggingFace",
+        urls=("https://huggingface.co/blog/feed.xml",),
+        icon="🤗",
+        gradient="linear-gradient(135deg, #FF6B35 0%, #FF8E53 100%)",
+        fetch_body=True,
+    ),
+    Feed(
+        name="arXiv",
+        urls=(
+            "https://export.arxiv.org/api/query?"
+            "search_query=cat:cs.AI&sortBy=submittedDate&sortOrder=descending&max_results={limit}",
+        ),
+        icon="📄",
+        gradient="linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)",
+        item_tag="entry",
+        fields=ATOM_FIELDS,
+        defaults={"text": "No summary available."},
+    ),
+    Feed(
+        name="TechCrunch",
+        urls=("https://techcrunch.com/tag/artificial-intelligence/feed/",),
+        icon="🚀",
+        gradient="linear-gradient(135deg, #10b981 0%, #34d399 100%)",
+    ),
+    Feed(
+        name="OpenAI",
+        urls=("https://openai.com/blog/rss.xml",),
+        icon="🧠",
+        gradient="linear-gradient(135deg, #00d4aa 0%, #00b4d8 100%)",
+    ),
+    Feed(
+        name="MIT News",
+        urls=("https://news.mit.edu/rss/topic/artificial-intelligence2",),
+        icon="🎓",
+        gradient="linear-gradient(135deg, #8b0000 0%, #dc143c 100%)",
+    ),
+    Feed(
+        name="VentureBeat",
+        urls=(
+            "https://feeds.feedburner.com/venturebeat/SZYF",
+            "https://venturebeat.com/feed/",
+            "https://venturebeat.com/category/ai/feed/",
+        ),
+        icon="💼",
+        gradient="linear-gradient(135deg, #ff6b6b 0%, #ffa500 100%)",
+        keywords=AI_KEYWORDS,
+        topic_urls=("https://venturebeat.com/category/ai/feed/",),
+    ),
+    Feed(
+        name="Towards DS",
+        urls=("https://towardsdatascience.com/feed",),
+        icon="📊",
+        gradient="linear-gradient(135deg, #1a1a1a 0%, #333333 100%)",
+        headers={"Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8"},
+    ),
+]
+
+FEEDS_BY_NAME = {feed.name: feed for feed in FEEDS}
+
+
+def _child_text(element, name):
+    # Prefer an un-namespaced child so e.g. <atom:link> inside an RSS item
+    # does not shadow the item's own <link>. Tags read "{namespace}name".
+    found = None
+    for child in element:
+        tag = child.tag
+        if not isinstance(tag, str) or tag.rpartition("}")[2] != name:
+            continue
+        if found is None or not tag.startswith("{"):
+            found = child
+        if not tag.startswith("{"):
+            break
+    if found is None:
+        return None
+    return "".join(found.itertext())
+
+
+def parse_feed(body, feed, url, limit):
+    """
+    Read up to limit matching items from an RSS or Atom document
+
+    Items are parsed one at a time and freed as soon as they are read, and
+    parsing stops at the limit, so the work does not grow with feed size.
+    """
+    # lxml is imported on first use so that importing the app does not pay for it.
+    from lxml import etree
+    defaults = dict(DEFAULTS, **feed.defaults)
+    items = []
+    if not body or limit <= 0:
+        return items
+    context = etree.iterparse(BytesIO(body), events=("end",), tag="{*}" + feed.item_tag,
+                              recover=True, resolve_entities=False, no_network=True)
+    try:
+        for _, element in context:
+            values = {}
+            for key, name in feed.fields.items():
+                text = _child_text(element, name)
+                values[key] = (text if text is not None else defaults[key]).strip()
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if not feed.matches(url, values["title"]):
+                continue
+            items.append(values)
+            if len(items) >= limit:
+                break
+    except etree.XMLSyntaxError as e:
+        if not items:
+            raise ValueError(f"could not parse feed {url}: {e}")
+    finally:
+        del context
+    return items
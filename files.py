@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+
+def atomic_write(path, data):
+    """
+    Replace path with data: bytes, str (written as UTF-8), or an iterable of
+    chunks that are all one or the other, such as json.JSONEncoder.iterencode()
+
+    The data goes to a temporary file in the same directory, which is then
+    renamed over path, so readers see the old file or the new one and never
+    part of either. The temporary file is removed if anything fails.
+    """
+    chunks = iter((data,) if isinstance(data, (bytes, str)) else data)
+    first = next(chunks, b"")
+    text = isinstance(first, str)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w" if text else "wb", encoding="utf-8" if text else None) as f:
+            f.write(first)
+            f.writelines(chunks)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+import http_client
+from files import atomic_write
+from metrics import Counter
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+
+LOOKUPS = Counter("http_cache_lookups_total",
+                  "Feed fetches by outcome: not_modified reused parsed items, reparsed reused the body",
+                  ["result"])
+
+
+class HTTPCache:
+    """
+    On-disk cache of feed responses keyed by URL
+
+    Each entry keeps the ETag/Last-Modified validators, the raw body and the
+    items parsed from it. A 304 reply returns the stored items without
+    touching the parser.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, url, suffix):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def load(self, url):
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_body(self, url):
+        try:
+            with open(self._path(url, ".body"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url, etag, last_modified, body, items, key):
+        # Body first, so an entry never points at a body that is not on disk.
+        atomic_write(self._path(url, ".body"), body)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "key": key,
+            "items": items,
+        }
+        atomic_write(self._path(url, ".json"), json.dumps(entry))
+
+    def fetch(self, url, parse, key=None, headers=None, timeout=None):
+        """
+        GET url conditionally and return parse(body)
+
+        key identifies how the body was parsed (e.g. the item limit); stored
+        items are only reused when it matches, otherwise the cached body is
+        parsed again. Error statuses raise requests.HTTPError rather than
+        being parsed.
+        """
+        key = None if key is None else str(key)
+        entry = self.load(url)
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            if entry.get("key") == key:
+                LOOKUPS.inc(result="not_modified")
+                return entry["items"]
+            body = self.load_body(url)
+            if body is not None:
+                LOOKUPS.inc(result="reparsed")
+                items = parse(body)
+                self.store(url, entry.get("etag"), entry.get("last_modified"), body, items, key)
+                return items
+            # Body went missing; fetch it again without validators.
+            response = http_client.get(url, headers=headers, timeout=timeout)
+
+        response.raise_for_status()
+        LOOKUPS.inc(result="fetched")
+        items = parse(response.content)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            try:
+                self.store(url, etag, last_modified, response.content, items, key)
+            except OSError as e:
+                print(f"Could not cache {url}: {e}")
+        return items
+
+
+default_cache = HTTPCache()
+
+
+def fetch_cached(url, parse, key=None, headers=None, timeout=None):
+    """Conditional GET through the shared on-disk cache"""
+    return default_cache.fetch(url, parse, key=key, headers=headers, timeout=timeout)
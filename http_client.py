@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from metrics import Counter, Histogram
+
+USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0 (compatible; AITrendsDashboard/1.0)")
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HOST_CONCURRENCY = int(os.getenv("HTTP_HOST_CONCURRENCY", "4"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+# Longest wait honoured from a Retry-After header, which is slept with the host slot held.
+MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "5"))
+
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+REQUESTS = Counter("http_client_requests_total", "Outgoing HTTP requests by host and response status",
+                   ["host", "status"])
+REQUEST_SECONDS = Histogram("http_client_request_seconds",
+                            "Outgoing request time, to the headers for streamed responses", ["host"])
+RESPONSE_BYTES = Counter("http_client_response_bytes_total", "Response body bytes read", ["host"])
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+
+
+def _make_session():
+    # requests is imported here so that importing the app does not pay for it.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class CappedRetry(Retry):
+        def get_retry_after(self, response):
+            retry_after = super().get_retry_after(response)
+            return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+    session = requests.Session()
+    retry = CappedRetry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        # Hand the last response back instead of raising, so callers see the status.
+        raise_on_status=False,
+    )
+    # Keep-alive connections are pooled per host and reused across refreshes.
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=HOST_CONCURRENCY, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session():
+    """The shared session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _make_session()
+    return _session
+
+
+@contextmanager
+def host_slot(url):
+    """Limit how many requests run against one host at the same time"""
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.setdefault(host, threading.BoundedSemaphore(HOST_CONCURRENCY))
+    with slot:
+        yield
+
+
+def count_bytes(url, amount):
+    """Record body bytes read from a streamed response"""
+    RESPONSE_BYTES.inc(amount, host=urlparse(url).netloc)
+
+
+def _get(url, headers, timeout, stream):
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout, stream=stream)
+    except Exception:
+        REQUESTS.inc(host=host, status="error")
+        raise
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, host=host)
+    REQUESTS.inc(host=host, status=response.status_code)
+    if not stream:
+        RESPONSE_BYTES.inc(len(response.content), host=host)
+    return response
+
+
+def get(url, headers=None, timeout=None, stream=False):
+    """
+    GET through the shared session with default timeouts and the per-host cap
+
+    With stream=True the caller must hold host_slot(url) itself for as long
+    as it reads the body, and report what it read with count_bytes().
+    """
+    timeout = timeout or DEFAULT_TIMEOUT
+    if stream:
+        return _get(url, headers, timeout, stream=True)
+    with host_slot(url):
+        return _get(url, headers, timeout, stream=False)
@@ -0,0 +1,153 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a cached page render up to a slow feed or LLM call.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class _Metric:
+    """
+    Base for process-local metrics
+
+    labels names the label keys every sample must be given. A metric built
+    with function= has no state of its own: the function is called at
+    scrape time and returns a value, or {label values tuple: value}.
+    """
+    kind = None
+
+    def __init__(self, name, help, labels=(), function=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _current(self):
+        if self.function is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.function()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self):
+        """(name, [(label, value)], value) triples for the exposition format"""
+        for key, value in sorted(self._current().items()):
+            yield self.name, list(zip(self.labels, key)), value
+
+    def value(self, **labels):
+        return self._current().get(self._key(labels), 0)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; values are [bucket counts, sum, count]"""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(state[0]), state[1], state[2]) for key, state in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                yield self.name + "_bucket", labels + [("le", _format_value(bound))], cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+    def value(self, **labels):
+        """(sum, count) of the observations for one label set"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return (state[1], state[2]) if state else (0.0, 0)
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        try:
+            samples = list(metric.samples())
+        except Exception as e:
+            print(f"Could not collect {metric.name}: {e}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in samples:
+            if value is None:
+                continue
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+import json
+import os
+import random
+import statistics
+import threading
+import time
+
+from files import atomic_write
+
+POLL_STATE_PATH = os.getenv("POLL_STATE_PATH", os.path.join("data", "polling.json"))
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "1") != "0"
+# A source is polled this often relative to the gap it usually leaves between posts.
+POLL_FRACTION = 0.5
+POLL_MAX_INTERVAL = int(os.getenv("POLL_MAX_INTERVAL_SECONDS", str(6 * 3600)))
+POLL_JITTER = 0.1
+# Post times remembered per source to learn its interval from.
+POST_HISTORY = 10
+BREAKER_BASE = int(os.getenv("BREAKER_BASE_SECONDS", "300"))
+BREAKER_MAX = int(os.getenv("BREAKER_MAX_SECONDS", str(24 * 3600)))
+
+
+def _jittered(seconds):
+    return seconds * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+
+class PollSchedule:
+    """
+    When each source is worth polling again, and which of its URLs to try
+
+    A source's interval is learned from the gaps between its recent post
+    times: one that posts every few hours is polled every refresh or so,
+    one that posts weekly every POLL_MAX_INTERVAL. Each URL has a circuit
+    breaker: after a failure it is left alone for BREAKER_BASE seconds,
+    doubling with every further failure up to BREAKER_MAX, then tried once
+    more. The URL that last returned items is tried first. State is kept in
+    a JSON file so restarts and other workers keep the schedule.
+    """
+
+    def __init__(self, path=POLL_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sources = {}
+        self._urls = {}
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except OSError:
+            return
+        except ValueError as e:
+            print(f"Could not load poll schedule from {self.path}: {e}")
+            return
+        self._sources = state.get("sources", {})
+        self._urls = state.get("urls", {})
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({"sources": self._sources, "urls": self._urls}, indent=1)
+        try:
+            atomic_write(self.path, data)
+        except OSError as e:
+            print(f"Could not save poll schedule to {self.path}: {e}")
+
+    def _open(self, url, now):
+        breaker = self._urls.get(url)
+        return breaker is not None and breaker["retry_at"] > now
+
+    def skip_reason(self, source, urls, now=None):
+        """None if the source should be polled now, else "not_due" or "circuit_open" """
+        now = time.time() if now is None else now
+        with self._lock:
+            if all(self._open(url, now) for url in urls):
+                return "circuit_open"
+            if self._sources.get(source, {}).get("next_poll", 0) > now:
+                return "not_due"
+        return None
+
+    def urls(self, source, urls, now=None):
+        """The URLs worth trying, the one that last worked first and open breakers left out"""
+        now = time.time() if now is None else now
+        with self._lock:
+            preferred = self._sources.get(source, {}).get("preferred_url")
+            ordered = sorted(urls, key=lambda url: url != preferred)
+            return [url for url in ordered if not self._open(url, now)]
+
+    def url_failed(self, url, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            breaker = self._urls.setdefault(url, {"failures": 0})
+            breaker["failures"] += 1
+            backoff = min(BREAKER_BASE * 2 ** (breaker["failures"] - 1), BREAKER_MAX)
+            breaker["retry_at"] = now + _jittered(backoff)
+            return breaker["retry_at"] - now
+
+    def url_succeeded(self, url):
+        with self._lock:
+            self._urls.pop(url, None)
+
+    def polled(self, source, url, published, now=None):
+        """
+        Record a successful poll: url returned items with these post times
+        (0 for unknown ones); returns the seconds until the next poll
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._sources.setdefault(source, {})
+            if url is not None:
+                state["preferred_url"] = url
+            history = set(state.get("posts", [])) | {int(t) for t in published if t}
+            state["posts"] = sorted(history)[-POST_HISTORY:]
+            state["interval"] = self._interval(state["posts"])
+            wait = min(state["interval"] * POLL_FRACTION, POLL_MAX_INTERVAL) if state["interval"] else 0
+            state["next_poll"] = now + _jittered(wait)
+            state["last_poll"] = now
+            return state["next_poll"] - now
+
+    @staticmethod
+    def _interval(posts):
+        """Typical seconds between posts, or None until there are two to compare"""
+        gaps = [b - a for a, b in zip(posts, posts[1:])]
+        return statistics.median(gaps) if gaps else None
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "sources": {
+                    name: {
+                        "interval": state.get("interval"),
+                        "next_poll_in": max(0, round(state.get("next_poll", 0) - now)),
+                        "preferred_url": state.get("preferred_url"),
+                    } for name, state in self._sources.items()
+                },
+                "open_circuits": {
+                    url: {"failures": breaker["failures"], "retry_in": round(breaker["retry_at"] - now)}
+                    for url, breaker in self._urls.items() if breaker["retry_at"] > now
+                },
+            }
+
+    def intervals(self):
+        """{(source,): seconds between polls} for the metrics gauge"""
+        with self._lock:
+            return {(name,): min(state["interval"] * POLL_FRACTION, POLL_MAX_INTERVAL) if state.get("interval") else 0
+                    for name, state in self._sources.items()}
@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute
+
+    The bucket starts full, so a burst of up to one minute's allowance goes
+    through immediately.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, deadline=None):
+        """
+        Block until amount tokens are available and take them
+
+        deadline is a time.monotonic() value; returns False without taking
+        anything if the tokens could not be had before it.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                delay = (amount - self.tokens) / self.rate
+            if deadline is not None and now + delay > deadline:
+                return False
+            time.sleep(min(delay, 1.0))
+
+    def release(self, amount=1):
+        """Give back tokens taken for work that did not happen"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied together"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens, deadline=None):
+        """Take one request and tokens before deadline; False, with nothing taken, if that is not possible"""
+        if not self.requests.acquire(1, deadline):
+            return False
+        if not self.tokens.acquire(tokens, deadline):
+            self.requests.release(1)
+            return False
+        return True
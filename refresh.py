@@ -0,0 +1,298 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+
+try:
+    import fcntl
+except ImportError:  # no cross-process lock off POSIX; each process then refreshes on its own
+    fcntl = None
+
+from files import atomic_write
+
+# How often a worker re-checks while another one is building the snapshot.
+FOLLOWER_POLL_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable result of one refresh run"""
+    articles: list
+    version: int
+    created_at: float
+    duration: float
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class Refresher:
+    """
+    Rebuild a snapshot in the background and swap it in atomically
+
+    With a path, the snapshot is shared by every process using that path
+    (e.g. gunicorn workers): a refresh only runs in the process holding an
+    exclusive lock on path + ".lock", its result is written to path
+    atomically, and the other processes load it when the file changes.
+    on_snapshot, if given, is called with every snapshot this process
+    builds or publishes, e.g. to render it before anyone asks for it.
+    Articles are saved as JSON; load_articles turns what was saved back
+    into what build returns.
+    """
+
+    def __init__(self, build, interval=900, path=None, on_snapshot=None, load_articles=None):
+        self.build = build
+        self.on_snapshot = on_snapshot
+        self.load_articles = load_articles
+        self._announced = 0
+        self._announce_lock = threading.Lock()
+        self.interval = interval
+        self.path = path
+        self._snapshot = None
+        self._loaded_mtime = None
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._flight_lock = threading.Lock()
+        self._flight = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = "idle"
+        self._last_error = None
+        self._last_started = None
+        self._last_finished = None
+        self._next_refresh = None
+
+    @property
+    def snapshot(self):
+        # Readers only ever see a fully built snapshot: the reference is
+        # replaced in one assignment once the new one is complete.
+        if self.path:
+            self._load()
+        return self._snapshot
+
+    def _load(self):
+        """Pick up a newer snapshot written by another process"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        with self._load_lock:
+            if mtime == self._loaded_mtime:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if self.load_articles is not None:
+                    data["articles"] = self.load_articles(data["articles"])
+                snapshot = Snapshot(**data)
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                print(f"Could not load snapshot from {self.path}: {e}")
+                snapshot = None
+            self._loaded_mtime = mtime
+            if snapshot and (self._snapshot is None or snapshot.version > self._snapshot.version):
+                self._snapshot = snapshot
+                if self._state == "waiting":
+                    self._state = "idle"
+
+    def _save(self, snapshot):
+        # Not asdict(), which would deep-copy every article first; encoded
+        # in chunks as json.dump() would, rather than as one string.
+        atomic_write(self.path, json.JSONEncoder(ensure_ascii=False).iterencode(
+            {field.name: getattr(snapshot, field.name) for field in fields(snapshot)}))
+        self._loaded_mtime = os.stat(self.path).st_mtime_ns
+
+    @contextmanager
+    def _leader(self):
+        """True while this process holds the cross-process refresh lock, False if another does"""
+        if not self.path or fcntl is None:
+            yield True
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def state(self):
+        return self._state
+
+    def refresh(self, if_older_than=None, timeout=None):
+        """
+        Run one refresh; returns the new snapshot, or None on failure or
+        when another process is already refreshing
+
+        Calls made while a refresh is running wait for it and share its
+        result instead of starting another one; timeout bounds that wait.
+        With if_older_than, a snapshot younger than that many seconds
+        (e.g. one another process just wrote) is returned as is.
+        """
+        with self._flight_lock:
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = Future()
+        if not leader:
+            try:
+                return flight.result(timeout)
+            except TimeoutError:
+                return None
+
+        try:
+            snapshot = self._refresh(if_older_than)
+            flight.set_result(snapshot)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._flight_lock:
+                self._flight = None
+        # After the waiting callers have their result, so they do not wait for this too.
+        self._announce(snapshot)
+        return snapshot
+
+    def refresh_async(self, if_older_than=None):
+        """Start a refresh in a background thread unless one is already running"""
+        if self._flight is not None:
+            return False
+        threading.Thread(target=self.refresh, args=(if_older_than,),
+                         name="snapshot-refresh", daemon=True).start()
+        return True
+
+    def _refresh(self, if_older_than):
+        with self._refresh_lock, self._leader() as leader:
+            if not leader:
+                self._state = "waiting"
+                return None
+            current = self.snapshot
+            if if_older_than is not None and current and current.age < if_older_than:
+                self._state = "idle"
+                return current
+
+            self._state = "refreshing"
+            self._last_started = time.time()
+            try:
+                articles = self.build()
+            except Exception as e:
+                print(f"Refresh failed: {e}")
+                self._state = "error"
+                self._last_error = str(e)
+                self._last_finished = time.time()
+                return None
+
+            finished = time.time()
+            version = current.version + 1 if current else 1
+            snapshot = Snapshot(
+                articles=articles,
+                version=version,
+                created_at=finished,
+                duration=finished - self._last_started,
+            )
+            if self.path:
+                try:
+                    self._save(snapshot)
+                except OSError as e:
+                    print(f"Could not save snapshot to {self.path}: {e}")
+            self._snapshot = snapshot
+            self._state = "idle"
+            self._last_error = None
+            self._last_finished = finished
+            return self._snapshot
+
+    def publish(self, articles):
+        """
+        Swap in new articles without a refresh, e.g. once better summaries
+        arrive; the snapshot keeps its age so refreshes stay on schedule
+
+        Returns the new snapshot, or None when another process holds the
+        refresh lock (its next refresh reads the same store anyway).
+        """
+        with self._refresh_lock, self._leader() as leader:
+            current = self.snapshot
+            if not leader or current is None:
+                return None
+            snapshot = Snapshot(
+                articles=articles,
+                version=current.version + 1,
+                created_at=current.created_at,
+                duration=current.duration,
+            )
+            if self.path:
+                try:
+                    self._save(snapshot)
+                except OSError as e:
+                    print(f"Could not save snapshot to {self.path}: {e}")
+            self._snapshot = snapshot
+        self._announce(snapshot)
+        return snapshot
+
+    def _announce(self, snapshot):
+        if self.on_snapshot is None or snapshot is None:
+            return
+        with self._announce_lock:
+            if snapshot.version <= self._announced:
+                return
+            self._announced = snapshot.version
+        try:
+            self.on_snapshot(snapshot)
+        except Exception as e:
+            print(f"on_snapshot failed for snapshot {snapshot.version}: {e}")
+
+    def start(self):
+        """Start the background loop; safe to call more than once"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            snapshot, waiting = self.snapshot, False
+            if snapshot is None or snapshot.age >= self.interval:
+                self.refresh(if_older_than=self.interval)
+                snapshot, waiting = self.snapshot, self._state == "waiting"
+            if waiting:
+                wait = min(self.interval, FOLLOWER_POLL_SECONDS)
+            elif snapshot is None or snapshot.age >= self.interval:
+                wait = self.interval   # the refresh failed; try again next interval
+            else:
+                # Refreshes follow the shared snapshot's age, whoever built it.
+                wait = self.interval - snapshot.age
+            self._next_refresh = time.time() + wait
+            self._stop.wait(wait)
+
+    def status(self):
+        snapshot = self.snapshot
+        return {
+            "state": self._state,
+            "pid": os.getpid(),
+            "snapshot_path": self.path,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "interval": self.interval,
+            "snapshot_version": snapshot.version if snapshot else None,
+            "snapshot_age": round(snapshot.age, 1) if snapshot else None,
+            "snapshot_articles": len(snapshot.articles) if snapshot else 0,
+            "last_duration": round(snapshot.duration, 2) if snapshot else None,
+            "last_started": self._last_started,
+            "last_finished": self._last_finished,
+            "last_error": self._last_error,
+            "next_refresh": self._next_refresh,
+        }
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+
+from flask import Response, request
+
+from files import atomic_write
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing.
+COMPRESS_MIN_BYTES = 512
+
+
+class EncodedBody:
+    """
+    A response body encoded once, ready to be served many times
+
+    Compression runs at the highest levels since its cost is paid once per
+    body rather than once per request.
+    """
+
+    def __init__(self, data):
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.encodings = {"identity": data}
+        if len(data) >= COMPRESS_MIN_BYTES:
+            self.encodings["gzip"] = gzip.compress(data, compresslevel=9)
+            if brotli is not None:
+                self.encodings["br"] = brotli.compress(data, quality=11)
+
+    def __len__(self):
+        return len(self.encodings["identity"])
+
+    def save(self, path, **meta):
+        """Write every encoding to path atomically, along with meta for load()"""
+        header = dict(meta, etag=self.etag, encodings={name: len(data) for name, data in self.encodings.items()})
+        atomic_write(path, [json.dumps(header).encode("utf-8") + b"\n", *self.encodings.values()])
+
+    @classmethod
+    def load(cls, path):
+        """(body, meta) as written by save(), or (None, None) if path is missing or unreadable"""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                sizes = header.pop("encodings")
+                encodings = {name: f.read(size) for name, size in sizes.items()}
+            etag = header.pop("etag")
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None, None
+        if any(len(encodings[name]) != size for name, size in sizes.items()):
+            return None, None
+        body = cls.__new__(cls)
+        body.etag = etag
+        body.encodings = encodings
+        return body, header
+
+
+def pick_encoding(encoded):
+    for encoding in ("br", "gzip"):
+        if encoding in encoded.encodings and request.accept_encodings[encoding]:
+            return encoding
+    return "identity"
+
+
+def send_encoded(encoded, mimetype, cache_control="no-cache"):
+    """
+    Serve a pre-encoded body with a strong ETag, answering 304 when the
+    client already has it
+
+    Each content encoding gets its own ETag, as a strong validator must
+    identify the exact bytes sent.
+    """
+    encoding = pick_encoding(encoded)
+    etag = encoded.etag if encoding == "identity" else f"{encoded.etag}-{encoding}"
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(encoded.encodings[encoding], mimetype=mimetype, headers=headers)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    return response
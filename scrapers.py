@@ -1,250 +1,352 @@
-import requests
-from bs4 import BeautifulSoup
+import codecs
 import time
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+import http_client
+from http_cache import fetch_cached
+from feeds import FEEDS, FEEDS_BY_NAME, parse_feed
+from dates import parse_timestamp
+from metrics import Counter, Gauge, Histogram
+from polling import ADAPTIVE_POLLING, PollSchedule
 
-def scrape_huggingface_blog(limit=3):
-    url = "https://huggingface.co/blog/feed.xml"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "lxml-xml")
-    articles = []
-    items = soup.find_all("item", limit=limit)
-    for item in items:
-        title = item.title.text if item.title else "No title"
-        link = item.link.text if item.link else "#"
-        pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-        
-        text = ""
-        if link and link != "#":
-            try:
-                article_resp = requests.get(link, timeout=10)
-                article_soup = BeautifulSoup(article_resp.text, "html.parser")
-                paragraphs = article_soup.find_all("p")
-                text = " ".join(p.get_text(strip=True) for p in paragraphs)
-            except:
-                text = "Content unavailable"
-        articles.append({
-            "title": title.strip(),
-            "link": link.strip(),
-            "date": pub_date.strip(),
-            "text": text if text else "No content available."
-        })
-    return articles
+# The dashboard only ever uses the first 1000 characters of an article body.
+ARTICLE_TEXT_CHARS = 1000
 
-def scrape_arxiv(limit=3):
-    url = (
-        "https://export.arxiv.org/api/query?"
-        "search_query=cat:cs.AI&sortBy=submittedDate&sortOrder=descending&max_results=" + str(limit)
-    )
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "lxml-xml")
-    articles = []
-    entries = soup.find_all("entry", limit=limit)
-    for entry in entries:
-        title = entry.title.text if entry.title else "No title"
-        link = entry.id.text if entry.id else "#"
-        summary = entry.summary.text if entry.summary else "No summary available."
-        pub_date = entry.published.text if entry.published else "Unknown date"
-        articles.append({
-            "title": title.strip(),
-            "link": link.strip(),
-            "date": pub_date.strip(),
-            "text": summary.strip()
-        })
-    return articles
+SOURCE_SECONDS = Histogram("scrape_source_seconds", "Time to scrape one source, article pages included", ["source"])
+SOURCE_ITEMS = Counter("scrape_source_items_total", "Items parsed per source", ["source"])
+SOURCE_FAILURES = Counter("scrape_source_failures_total", "Sources that failed or timed out", ["source", "reason"])
+SOURCE_SKIPPED = Counter("scrape_source_skipped_total", "Sources left out of a refresh by the poll schedule",
+                         ["source", "reason"])
 
-def scrape_techcrunch_ai(limit=3):
-    url = "https://techcrunch.com/tag/artificial-intelligence/feed/"
+poll_schedule = PollSchedule()
+Gauge("scrape_poll_interval_seconds", "Learned time between polls of each source; 0 polls every refresh",
+      ["source"], function=lambda: poll_schedule.intervals())
+
+
+class _ParagraphExtractor(HTMLParser):
+    """Collect <p> text incrementally and flag when enough has been seen"""
+
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.length = 0
+        self._depth = 0
+        self._current = []
+
+    @property
+    def done(self):
+        return self.max_chars is not None and self.length >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._depth:
+            self._current.append(data.strip())
+
+    def _flush(self):
+        # Same result as BeautifulSoup's get_text(strip=True) on each <p>.
+        text = "".join(self._current)
+        self._current = []
+        self.paragraphs.append(text)
+        self.length += len(text) + 1
+
+    def text(self):
+        if self._current:
+            self._flush()
+        return " ".join(self.paragraphs)
+
+
+def fetch_article_text(url, max_chars=ARTICLE_TEXT_CHARS, stream=True, timeout=None, chunk_size=8192):
+    """
+    Return the paragraph text of an article page
+
+    In streaming mode the body is read chunk by chunk and the download is
+    abandoned as soon as max_chars of paragraph text have been collected.
+    """
+    if not stream:
+        from bs4 import BeautifulSoup
+        response = http_client.get(url, timeout=timeout)
+        soup = BeautifulSoup(response.text, "html.parser")
+        return " ".join(p.get_text(strip=True) for p in soup.find_all("p"))
+
+    extractor = _ParagraphExtractor(max_chars)
+    read = 0
+    with http_client.host_slot(url), http_client.get(url, timeout=timeout, stream=True) as response:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                read += len(chunk)
+                extractor.feed(decoder.decode(chunk))
+                if extractor.done:
+                    break
+        finally:
+            http_client.count_bytes(url, read)
+    return extractor.text()
+
+
+def _fetch_article_text_safe(link):
+    if not link or link == "#":
+        return ""
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "xml")
-        articles = []
-        items = soup.find_all("item", limit=limit)
-        for item in items:
-            title = item.title.text if item.title else "No title"
-            link = item.link.text if item.link else "#"
-            description = item.description.text if item.description else "No description available."
-            pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-            articles.append({
-                "title": title.strip(),
-                "link": link.strip(),
-                "date": pub_date.strip(),
-                "text": description.strip()
-            })
-        return articles
+        return fetch_article_text(link)
     except:
-        return []
+        return "Content unavailable"
+
+
+def _fetch_bodies(articles):
+    # Article pages are fetched in parallel; http_client caps the load on each host.
+    with ThreadPoolExecutor(max_workers=max(1, len(articles))) as executor:
+        texts = executor.map(_fetch_article_text_safe, [a["link"] for a in articles])
+        for article, text in zip(articles, texts):
+            article["text"] = text if text else "No content available."
+    return articles
+
+
+class PolledArticles(list):
+    """
+    Articles from one feed, with what the poll schedule should learn from them
+
+    The schedule is only told once the articles are actually used (see
+    record_poll), so a source whose result is dropped at its timeout stays
+    due and its URLs keep their breakers.
+    """
+
+    def __init__(self, articles, feed_name, succeeded, template):
+        super().__init__(articles)
+        self.feed_name = feed_name
+        self.succeeded = succeeded
+        self.template = template
 
+    def record_poll(self):
+        for template in self.succeeded:
+            poll_schedule.url_succeeded(template)
+        poll_schedule.polled(self.feed_name, self.template, [article["published"] for article in self])
+
+
+def record_poll(articles):
+    """Tell the poll schedule a scraper's result was accepted; other scrapers' lists are left alone"""
+    if isinstance(articles, PolledArticles):
+        articles.record_poll()
+    return articles
+
+
+def scrape_feed(feed, limit=3):
+    """
+    Scrape one registered feed, falling through its URLs until one has items
+
+    Returns PolledArticles; raises the last error if every URL failed
+    outright.
+    """
+    with SOURCE_SECONDS.time(source=feed.name):
+        articles = _scrape_feed_urls(feed, limit)
+    SOURCE_ITEMS.inc(len(articles), source=feed.name)
+    return articles
+
+
+def _scrape_feed_urls(feed, limit):
+    error, succeeded = None, []
+    # The URL that last had items goes first and URLs with an open circuit
+    # are left out, unless that leaves nothing to try.
+    for template in poll_schedule.urls(feed.name, feed.urls) or feed.urls:
+        url = template.replace("{limit}", str(limit))
+        try:
+            articles = fetch_cached(url, partial(parse_feed, feed=feed, url=url, limit=limit),
+                                    key=limit, headers=feed.headers, timeout=feed.timeout)
+            # Bodies are fetched after the cache, so only feed items are
+            # stored there and a page that failed once is tried again.
+            if feed.fetch_body:
+                articles = _fetch_bodies(articles)
+        except Exception as e:
+            backoff = poll_schedule.url_failed(template)
+            print(f"Error with {feed.name} URL {url}: {e} (not retried for {backoff:.0f}s)")
+            error = e
+            continue
+        succeeded.append(template)
+        if articles:
+            # Parsed once here; the schedule, sorting, storage and display all use this value.
+            for article in articles:
+                article["published"] = parse_timestamp(article.get("date"))
+            return PolledArticles(articles, feed.name, succeeded, template)
+    if error is not None and not succeeded:
+        raise error
+    return PolledArticles([], feed.name, succeeded, None)
+
+
+def scrape_huggingface_blog(limit=3):
+    return scrape_feed(FEEDS_BY_NAME["HuggingFace"], limit)
+
+def scrape_arxiv(limit=3):
+    return scrape_feed(FEEDS_BY_NAME["arXiv"], limit)
+
+def scrape_techcrunch_ai(limit=3):
+    return scrape_feed(FEEDS_BY_NAME["TechCrunch"], limit)
 
 def scrape_openai_blog(limit=3):
     """Scrape OpenAI Blog RSS"""
-    url = "https://openai.com/blog/rss.xml"
-    try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "xml")
-        articles = []
-        items = soup.find_all("item", limit=limit)
-        for item in items:
-            title = item.title.text if item.title else "No title"
-            link = item.link.text if item.link else "#"
-            description = item.description.text if item.description else "No description available."
-            pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-            articles.append({
-                "title": title.strip(),
-                "link": link.strip(),
-                "date": pub_date.strip(),
-                "text": description.strip()
-            })
-        return articles
-    except Exception as e:
-        print(f"Error scraping OpenAI: {e}")
-        return []
+    return scrape_feed(FEEDS_BY_NAME["OpenAI"], limit)
 
 def scrape_mit_news_ai(limit=3):
     """Scrape MIT News AI section"""
-    url = "https://news.mit.edu/rss/topic/artificial-intelligence2"
-    try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "xml")
-        articles = []
-        items = soup.find_all("item", limit=limit)
-        for item in items:
-            title = item.title.text if item.title else "No title"
-            link = item.link.text if item.link else "#"
-            description = item.description.text if item.description else "No description available."
-            pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-            articles.append({
-                "title": title.strip(),
-                "link": link.strip(),
-                "date": pub_date.strip(),
-                "text": description.strip()
-            })
-        return articles
-    except Exception as e:
-        print(f"Error scraping MIT News: {e}")
-        return []
+    return scrape_feed(FEEDS_BY_NAME["MIT News"], limit)
 
 def scrape_venturebeat_ai(limit=3):
-    """Scrape VentureBeat AI section - Updated with working RSS URL"""
-    
-    urls = [
-        "https://feeds.feedburner.com/venturebeat/SZYF",  
-        "https://venturebeat.com/feed/",  
-        "https://venturebeat.com/category/ai/feed/"  
-    ]
-    
-    for url in urls:
-        try:
-            response = requests.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, "xml")
-            articles = []
-            items = soup.find_all("item")[:limit] 
-            
-            ai_articles = []
-            for item in items:
-                title = item.title.text if item.title else "No title"
-               
-                if "ai/" in url or any(keyword in title.lower() for keyword in ['ai', 'artificial intelligence', 'machine learning', 'deep learning']):
-                    link = item.link.text if item.link else "#"
-                    description = item.description.text if item.description else "No description available."
-                    pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-                    ai_articles.append({
-                        "title": title.strip(),
-                        "link": link.strip(),
-                        "date": pub_date.strip(),
-                        "text": description.strip()
-                    })
-                    if len(ai_articles) >= limit:
-                        break
-            
-            if ai_articles: 
-                return ai_articles
-                
-        except Exception as e:
-            print(f"Error with VentureBeat URL {url}: {e}")
-            continue
-    
-    print("All VentureBeat URLs failed")
-    return []
+    """Scrape VentureBeat AI section, trying each fallback feed in turn"""
+    return scrape_feed(FEEDS_BY_NAME["VentureBeat"], limit)
 
 def scrape_towards_data_science(limit=3):
     """Scrape Towards Data Science Medium feed (always returns latest N posts)"""
-    url = "https://towardsdatascience.com/feed"
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8"
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        soup = BeautifulSoup(response.text, "xml")
-
-        articles = []
-        items = soup.find_all("item", limit=limit)
-
-        for item in items:
-            title = item.title.text if item.title else "No title"
-            link = item.link.text if item.link else "#"
-            description = item.description.text if item.description else "No description available."
-            pub_date = item.pubDate.text if item.pubDate else "Unknown date"
-
-            articles.append({
-                "title": title.strip(),
-                "link": link.strip(),
-                "date": pub_date.strip(),
-                "text": description.strip()
-            })
-
-        return articles
-    except Exception as e:
-        print(f"Error scraping TDS: {e}")
-        return []
-
-
-from dateutil import parser
-
-def scrape_ai_news_aggregated(limit_per_source=2):
-    """
-    Aggregate AI news from all sources and sort by date
-    """
+    return scrape_feed(FEEDS_BY_NAME["Towards DS"], limit)
+
+
+
+BG_GRADIENT = "linear-gradient(135deg, rgba(255,255,255,0.05) 0%, rgba(255,255,255,0.02) 100%)"
+
+SOURCES = [
+    (feed.name, partial(scrape_feed, feed), feed.icon, feed.gradient)
+    for feed in FEEDS
+]
+
+
+def _tag_articles(articles, source_name):
+    # Icons and gradients are not copied in: the dashboard looks them up by source.
+    for article in articles:
+        article['source'] = source_name
+        # Feed scrapers already parsed it; other scrapers only give a date.
+        if 'published' not in article:
+            article['published'] = parse_timestamp(article.get('date'))
+    return articles
+
+
+def _scrape_sequential(sources, limit_per_source, on_source=None):
     all_articles = []
-    
-    sources = [
-        ("HuggingFace", scrape_huggingface_blog, "🤗", "linear-gradient(135deg, #FF6B35 0%, #FF8E53 100%)"),
-        ("arXiv", scrape_arxiv, "📄", "linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)"),
-        ("TechCrunch", scrape_techcrunch_ai, "🚀", "linear-gradient(135deg, #10b981 0%, #34d399 100%)"),
-        ("OpenAI", scrape_openai_blog, "🧠", "linear-gradient(135deg, #00d4aa 0%, #00b4d8 100%)"),
-        ("MIT News", scrape_mit_news_ai, "🎓", "linear-gradient(135deg, #8b0000 0%, #dc143c 100%)"),
-        ("VentureBeat", scrape_venturebeat_ai, "💼", "linear-gradient(135deg, #ff6b6b 0%, #ffa500 100%)"),
-        ("Towards DS", scrape_towards_data_science, "📊", "linear-gradient(135deg, #1a1a1a 0%, #333333 100%)")
-    ]
-    
-    for source_name, scraper_func, icon, gradient in sources:
+    for source_name, scraper_func, _, _ in sources:
         try:
             print(f"Scraping {source_name}...")
-            articles = scraper_func(limit_per_source)
-            for article in articles:
-                article['source'] = source_name
-                article['icon'] = icon
-                article['gradient'] = gradient
-                article['bg_gradient'] = "linear-gradient(135deg, rgba(255,255,255,0.05) 0%, rgba(255,255,255,0.02) 100%)"
+            articles = _tag_articles(record_poll(scraper_func(limit_per_source)), source_name)
+            if on_source is not None:
+                on_source(source_name, articles)
             all_articles.extend(articles)
             time.sleep(1)  
         except Exception as e:
             print(f"Failed to scrape {source_name}: {e}")
+            SOURCE_FAILURES.inc(source=source_name, reason="error")
             continue
-    
-    
-    def parse_date_safe(d):
-        try:
-            return parser.parse(d)
-        except:
-            return parser.parse("1970-01-01")  
+    return all_articles
+
+
+def iter_sources(limit_per_source=2, source_timeout=20, deadline=30, max_workers=None, sources=None):
+    """
+    Run every scraper in a thread pool and yield (source_name, articles)
+    as each one finishes, skipping sources that fail or run out of time
+    """
+    sources = SOURCES if sources is None else sources
+    started = {}
+    begin = time.monotonic()
+    overall_cutoff = begin + deadline
+
+    def run(source_name, scraper_func):
+        started[source_name] = time.monotonic()
+        print(f"Scraping {source_name}...")
+        return scraper_func(limit_per_source)
 
-    all_articles.sort(key=lambda x: parse_date_safe(x["date"]), reverse=True)
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(sources)), thread_name_prefix="scrape")
+    futures = {
+        executor.submit(run, source_name, scraper_func): source_name
+        for source_name, scraper_func, _, _ in sources
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            now = time.monotonic()
+            # A source that has not started yet only answers to the overall deadline.
+            cutoffs = {
+                f: min(overall_cutoff, started[futures[f]] + source_timeout)
+                if futures[f] in started else overall_cutoff
+                for f in pending
+            }
+            expired = {f for f, cutoff in cutoffs.items() if cutoff <= now}
+            for f in expired:
+                print(f"Timed out scraping {futures[f]}")
+                SOURCE_FAILURES.inc(source=futures[f], reason="timeout")
+                f.cancel()
+            pending -= expired
+            if not pending:
+                break
+
+            done, pending = wait(pending, timeout=min(cutoffs[f] for f in pending) - now,
+                                 return_when=FIRST_COMPLETED)
+            for f in done:
+                source_name = futures[f]
+                try:
+                    articles = f.result()
+                except Exception as e:
+                    print(f"Failed to scrape {source_name}: {e}")
+                    SOURCE_FAILURES.inc(source=source_name, reason="error")
+                    continue
+                # Only now is the result used, so only now does the schedule hear of it.
+                yield source_name, _tag_articles(record_poll(articles), source_name)
+    finally:
+        # Stragglers keep running in their threads but are no longer waited on.
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"Scraped {len(sources)} sources in {time.monotonic() - begin:.1f}s")
+
+
+def _due_sources(sources):
+    """Leave out sources the poll schedule says are not worth fetching yet"""
+    due = []
+    for source in sources:
+        feed = FEEDS_BY_NAME.get(source[0])
+        reason = feed and poll_schedule.skip_reason(feed.name, feed.urls)
+        if reason:
+            print(f"Skipping {source[0]}: {reason.replace('_', ' ')}")
+            SOURCE_SKIPPED.inc(source=source[0], reason=reason)
+        else:
+            due.append(source)
+    return due
+
+
+def scrape_ai_news_aggregated(limit_per_source=2, concurrent=True, source_timeout=20,
+                              deadline=30, max_workers=None, sources=None, on_source=None):
+    """
+    Aggregate AI news from all sources and sort by date
+
+    With concurrent=True the sources are fetched in parallel; a source is
+    dropped once it has run for source_timeout seconds or the whole call
+    has taken deadline seconds, and the results that did arrive are returned.
+    on_source, if given, is called with (source_name, articles) as each
+    source finishes, before the rest are in. With ADAPTIVE_POLLING, sources that are not due yet or whose every URL
+    has an open circuit are not fetched at all; their earlier articles stay
+    in the store.
+    """
+    sources = SOURCES if sources is None else sources
+    if ADAPTIVE_POLLING:
+        sources = _due_sources(sources)
+    if concurrent:
+        all_articles = []
+        for source_name, articles in iter_sources(limit_per_source, source_timeout, deadline, max_workers, sources):
+            if on_source is not None:
+                on_source(source_name, articles)
+            all_articles.extend(articles)
+    else:
+        all_articles = _scrape_sequential(sources, limit_per_source, on_source)
+    
     
+    all_articles.sort(key=lambda x: x["published"], reverse=True)
+    poll_schedule.save()
     return all_articles
 
 
 
 def get_all_articles(limit_per_source=2):
     """Get all articles from all sources"""
-    return scrape_ai_news_aggregated(limit_per_source)
\ No newline at end of file
+    return scrape_ai_news_aggregated(limit_per_source)
@@ -0,0 +1,53 @@
+// Animate counter
+function animateCounter(element, target) {
+    let current = 0;
+    const increment = target / 40;
+    const timer = setInterval(() => {
+        current += increment;
+        if (current >= target) {
+            element.textContent = target;
+            clearInterval(timer);
+        } else {
+            element.textContent = Math.ceil(current);
+        }
+    }, 30);
+}
+
+// Initialize animations
+document.addEventListener('DOMContentLoaded', function() {
+    // Animate cards with staggered timing
+    const cards = document.querySelectorAll('.card');
+    cards.forEach((card, index) => {
+        setTimeout(() => {
+            card.classList.add('animate');
+        }, index * 100);
+    });
+
+    // Animate counters
+    setTimeout(() => {
+        document.querySelectorAll('[data-target]').forEach(el => {
+            const target = parseInt(el.dataset.target);
+            if (!isNaN(target)) {
+                animateCounter(el, target);
+            }
+        });
+    }, 500);
+});
+
+// Show how old the snapshot is, relative to the viewer's clock
+function formatAge(seconds) {
+    if (seconds < 60) return 'Just now';
+    if (seconds < 3600) return Math.floor(seconds / 60) + ' min ago';
+    return Math.floor(seconds / 3600) + ' h ago';
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const updated = document.getElementById('stat-updated');
+    if (updated && updated.dataset.updated) {
+        const refresh = () => {
+            updated.textContent = formatAge(Date.now() / 1000 - parseFloat(updated.dataset.updated));
+        };
+        refresh();
+        setInterval(refresh, 60000);
+    }
+});
@@ -0,0 +1,397 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dates import parse_timestamp
+from extractive import STOPWORDS
+
+STORE_PATH = os.getenv("ARTICLE_STORE_PATH", os.path.join("data", "articles.sqlite3"))
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS articles ("
+    " id INTEGER PRIMARY KEY,"
+    " link TEXT NOT NULL UNIQUE,"
+    " source TEXT NOT NULL,"
+    " title TEXT NOT NULL,"
+    " date TEXT,"
+    " published INTEGER NOT NULL DEFAULT 0,"
+    " text TEXT,"
+    " content_hash TEXT NOT NULL,"
+    " summary TEXT,"
+    " first_seen REAL NOT NULL,"
+    " updated_at REAL NOT NULL,"
+    " signature BLOB,"
+    " duplicate_of INTEGER,"
+    " summary_kind TEXT)",
+    "CREATE INDEX IF NOT EXISTS articles_published ON articles (published DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS articles_source_published ON articles (source, published DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS articles_unsummarized ON articles (published DESC) WHERE summary IS NULL",
+    "CREATE INDEX IF NOT EXISTS articles_duplicate_of ON articles (duplicate_of) WHERE duplicate_of IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS articles_llm_pending ON articles (published DESC)"
+    " WHERE summary_kind = 'extractive' AND duplicate_of IS NULL",
+]
+
+# Full-text index over title, summary and source, kept in step with the
+# articles table by triggers, so every ingest or new summary updates it.
+SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    " title, summary, source, content='articles', content_rowid='id',"
+    " tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN"
+    " INSERT INTO articles_fts (rowid, title, summary, source) VALUES (new.id, new.title, new.summary, new.source);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN"
+    " INSERT INTO articles_fts (articles_fts, rowid, title, summary, source)"
+    " VALUES ('delete', old.id, old.title, old.summary, old.source);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, summary, source ON articles BEGIN"
+    " INSERT INTO articles_fts (articles_fts, rowid, title, summary, source)"
+    " VALUES ('delete', old.id, old.title, old.summary, old.source);"
+    " INSERT INTO articles_fts (rowid, title, summary, source) VALUES (new.id, new.title, new.summary, new.source);"
+    " END",
+]
+# bm25() weights for title, summary and source matches.
+SEARCH_WEIGHTS = (4.0, 1.0, 2.0)
+# Scoring every match of a word that is in most articles takes far too long,
+# so a search ranks at most this many of its newest matches.
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+
+# What produced a summary. Rows summarized before the column existed have
+# NULL here and count as LLM summaries.
+EXTRACTIVE = "extractive"
+LLM = "llm"
+
+# Columns added after the first release, for stores created before them.
+MIGRATIONS = [
+    ("signature", "ALTER TABLE articles ADD COLUMN signature BLOB"),
+    ("duplicate_of", "ALTER TABLE articles ADD COLUMN duplicate_of INTEGER"),
+    ("summary_kind", "ALTER TABLE articles ADD COLUMN summary_kind TEXT"),
+]
+
+COLUMNS = "id, link, source, title, date, published, text, summary, summary_kind, duplicate_of"
+
+# Summaries never read further into an article than this, so no more of
+# its text is stored, and none once it has its LLM summary.
+TEXT_CHARS = 1000
+
+
+_SEARCH_PART = re.compile(r'"([^"]*)"|(\S+)')
+_SEARCH_TOKEN = re.compile(r"\w+")
+
+
+def search_query(text):
+    """
+    FTS5 MATCH expression for what someone typed into a search box
+
+    Every word and "quoted phrase" has to match; a word ending in * matches
+    any word starting with it. Stopwords outside quotes are dropped, as they
+    are in nearly every article and only make the query slower. FTS5
+    operators in the input are treated as plain words. Raises ValueError if
+    nothing searchable is left.
+    """
+    parts, stopwords = [], []
+    for phrase, word in _SEARCH_PART.findall(text or ""):
+        tokens = _SEARCH_TOKEN.findall(phrase or word)
+        if not tokens:
+            continue
+        prefix = "*" if word.endswith("*") else ""
+        part = '"' + " ".join(tokens) + '"' + prefix
+        if word and not prefix and len(tokens) == 1 and tokens[0].lower() in STOPWORDS:
+            stopwords.append(part)
+        else:
+            parts.append(part)
+    # A query of nothing but stopwords ("the who") is searched as typed.
+    parts = parts or stopwords
+    if not parts:
+        raise ValueError("empty query")
+    return " ".join(parts)
+
+
+def content_hash(article):
+    data = "\0".join([article["title"], article.get("date") or "", article.get("text") or ""])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    """
+    SQLite store of every article ever scraped, unique by link
+
+    Ingesting only writes rows that are new or whose content changed; a
+    changed article loses its summary so it gets summarized again. A
+    summary is either a quick extractive one or the LLM's, which replaces
+    it when it arrives.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA[0])
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(articles)")}
+            for column, statement in MIGRATIONS:
+                if column not in existing:
+                    conn.execute(statement)
+            for statement in SCHEMA[1:]:
+                conn.execute(statement)
+            indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone()
+            for statement in SEARCH_SCHEMA:
+                conn.execute(statement)
+            if not indexed:
+                # A store from before the search index: index what it already holds.
+                conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def ingest(self, articles):
+        """
+        Insert new articles and update changed ones; returns (inserted, updated)
+
+        Changes are detected on the whole text, but only its first
+        TEXT_CHARS characters are stored.
+        """
+        now = time.time()
+        inserted = updated = 0
+        with self._lock:
+            conn = self._connect()
+            links = [article["link"] for article in articles]
+            known = {}
+            # Look the links up in chunks to stay under SQLite's parameter limit.
+            for i in range(0, len(links), 500):
+                chunk = links[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT link, content_hash FROM articles WHERE link IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                known.update((row["link"], row["content_hash"]) for row in rows)
+
+            for article in articles:
+                digest = content_hash(article)
+                text = article.get("text")
+                values = (
+                    article["source"], article["title"], article.get("date"),
+                    article.get("published") or parse_timestamp(article.get("date")),
+                    text[:TEXT_CHARS] if text else text, digest, now,
+                )
+                if article["link"] not in known:
+                    conn.execute(
+                        "INSERT INTO articles (source, title, date, published, text, content_hash,"
+                        " first_seen, updated_at, link) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        values[:6] + (now, now, article["link"]),
+                    )
+                    known[article["link"]] = digest
+                    inserted += 1
+                elif known[article["link"]] != digest:
+                    conn.execute(
+                        "UPDATE articles SET source = ?, title = ?, date = ?, published = ?, text = ?,"
+                        " content_hash = ?, updated_at = ?, summary = NULL, summary_kind = NULL,"
+                        " signature = NULL, duplicate_of = NULL WHERE link = ?",
+                        values + (article["link"],),
+                    )
+                    known[article["link"]] = digest
+                    updated += 1
+            conn.commit()
+        return inserted, updated
+
+    def unsummarized(self, limit=200):
+        """Newest articles that still need a summary"""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {COLUMNS} FROM articles WHERE summary IS NULL"
+                " ORDER BY published DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def llm_pending(self, limit=200):
+        """Newest stories that only have an extractive summary so far"""
+        with self._lock:
+            rows = self._connect().execute(
+                # Spelled out so SQLite can use the articles_llm_pending partial index.
+                f"SELECT {COLUMNS} FROM articles WHERE summary_kind = 'extractive' AND duplicate_of IS NULL"
+                " ORDER BY published DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_many(self, links):
+        """Stored rows for the given links, in the same order"""
+        rows = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(links), 500):
+                chunk = links[i:i + 500]
+                for row in conn.execute(
+                    f"SELECT {COLUMNS} FROM articles WHERE link IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ):
+                    rows[row["link"]] = dict(row)
+        return [rows[link] for link in links if link in rows]
+
+    def set_summaries(self, summaries, kind=LLM):
+        """Store (id, summary) pairs produced by kind; an LLM summary is final, so the text goes"""
+        text = "NULL" if kind == LLM else "text"
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f"UPDATE articles SET summary = ?, summary_kind = ?, text = {text} WHERE id = ?",
+                ((summary, kind, article_id) for article_id, summary in summaries),
+            )
+            conn.commit()
+
+    def set_signatures(self, signatures):
+        """Store (id, signature, duplicate_of) triples from near-duplicate detection"""
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE articles SET signature = ?, duplicate_of = ? WHERE id = ?",
+                ((signature, duplicate_of, article_id) for article_id, signature, duplicate_of in signatures),
+            )
+            conn.commit()
+
+    def final_with_text(self, limit=1000):
+        """Rows with an LLM summary that still hold their text, as in stores from before it was dropped"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, text, summary, duplicate_of FROM articles"
+                " WHERE summary_kind = 'llm' AND text IS NOT NULL LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def drop_text(self, ids):
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("UPDATE articles SET text = NULL WHERE id = ?", ((article_id,) for article_id in ids))
+            conn.commit()
+
+    def copy_summaries(self, duplicates):
+        """Give each duplicate its story's summary; duplicates maps id -> canonical id"""
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE articles SET (summary, summary_kind) ="
+                " (SELECT summary, summary_kind FROM articles WHERE id = ?) WHERE id = ?",
+                ((canonical, article_id) for article_id, canonical in duplicates.items()),
+            )
+            conn.executemany(
+                "UPDATE articles SET text = NULL WHERE id = ? AND summary_kind = 'llm'",
+                ((article_id,) for article_id in duplicates),
+            )
+            conn.commit()
+
+    def story_signatures(self, since):
+        """(id, signature) of summarized, non-duplicate articles published since a timestamp"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, signature FROM articles WHERE published >= ? AND signature IS NOT NULL"
+                " AND summary IS NOT NULL AND duplicate_of IS NULL",
+                (int(since),),
+            ).fetchall()
+        return [(row["id"], row["signature"]) for row in rows]
+
+    def duplicates_of(self, ids, columns=COLUMNS):
+        """{canonical id: [duplicate rows]} for the given stories; columns must include duplicate_of"""
+        found = {}
+        ids = list(ids)
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                for row in conn.execute(
+                    f"SELECT {columns} FROM articles WHERE duplicate_of IN ({','.join('?' * len(chunk))})"
+                    " ORDER BY published DESC",
+                    chunk,
+                ):
+                    found.setdefault(row["duplicate_of"], []).append(dict(row))
+        return found
+
+    def query(self, source=None, since=None, before=None, limit=50, summarized=True, stories=True,
+              columns=COLUMNS):
+        """
+        One page of articles, newest first, with only the given columns
+
+        since is a unix timestamp; before is the (published, id) of the last
+        row of the previous page, so every page is an index range scan.
+        With stories=True near-duplicates are left out; fetch them with
+        duplicates_of().
+        """
+        clauses, params = [], []
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if since is not None:
+            clauses.append("published >= ?")
+            params.append(int(since))
+        if before is not None:
+            clauses.append("(published < ? OR (published = ? AND id < ?))")
+            params.extend([before[0], before[0], before[1]])
+        if summarized:
+            clauses.append("summary IS NOT NULL")
+        if stories:
+            clauses.append("duplicate_of IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {columns} FROM articles {where} ORDER BY published DESC, id DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query, source=None, since=None, until=None, order="rank", limit=20, offset=0,
+               summarized=True, stories=True):
+        """
+        Articles matching a search_query() expression, best BM25 match
+        first, or newest first with order="date"
+
+        Only the SEARCH_CANDIDATES most recently stored matches that pass
+        the filters are ranked, which is every match for all but the most
+        common words. since and until are unix timestamps. As in query(),
+        articles without a summary yet are left out with summarized=True,
+        and near-duplicates with stories=True.
+        """
+        clauses, params = ["articles_fts MATCH ?"], [query]
+        if source:
+            clauses.append("a.source = ?")
+            params.append(source)
+        if since is not None:
+            clauses.append("a.published >= ?")
+            params.append(int(since))
+        if until is not None:
+            clauses.append("a.published < ?")
+            params.append(int(until))
+        if summarized:
+            clauses.append("a.summary IS NOT NULL")
+        if stories:
+            clauses.append("a.duplicate_of IS NULL")
+        columns = ", ".join(f"a.{column.strip()}" for column in COLUMNS.split(","))
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        ordering = "a.published DESC, a.id DESC" if order == "date" else "hits.score"
+        # The inner query walks the matches newest first and stops at the
+        # candidate limit; only the rows it returns are scored.
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {columns}, hits.score FROM ("
+                f" SELECT a.id, bm25(articles_fts, {weights}) AS score"
+                f" FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid"
+                f" WHERE {' AND '.join(clauses)} ORDER BY articles_fts.rowid DESC LIMIT ?"
+                f") hits JOIN articles a ON a.id = hits.id ORDER BY {ordering} LIMIT ? OFFSET ?",
+                params + [SEARCH_CANDIDATES, limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
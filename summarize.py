@@ -1,18 +1,265 @@
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from openai import OpenAI
+from metrics import Counter, Histogram
+from ratelimit import RateLimiter
+from summary_cache import SummaryCache, cache_key
 
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+summary_cache = SummaryCache()
+_client = None
+_client_lock = threading.Lock()
 
-def summarize_text(text, max_chars=400):
-    prompt = f"Summarize this text in 3-4 concise bullet points:\n\n{text[:max_chars]}"
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+MODEL = "gpt-4o-mini"
+PROMPT_TEMPLATE = "Summarize this text in 3-4 concise bullet points:\n\n{text}"
+
+CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "4"))
+rate_limiter = RateLimiter(
+    requests_per_minute=int(os.getenv("OPENAI_RPM", "500")),
+    tokens_per_minute=int(os.getenv("OPENAI_TPM", "200000")),
+)
+
+LLM_SECONDS = Histogram("llm_request_seconds", "OpenAI call latency by outcome", ["outcome"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used as reported by the API", ["kind"])
+LLM_RETRIES = Counter("llm_retries_total", "OpenAI calls retried after a 429, 5xx or connection error")
+SUMMARY_CACHE_LOOKUPS = Counter(
+    "summary_cache_lookups_total", "Summary cache lookups by result", ["result"],
+    function=lambda: {("hit",): summary_cache.hits, ("miss",): summary_cache.misses},
+)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def get_client():
+    """The OpenAI client, created on first use since importing the SDK takes most of a second"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def _retryable(error):
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+def _backoff(attempt, error):
+    """Full-jitter exponential backoff, honouring Retry-After when the API sends one"""
+    retry_after = None
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 0.5)
+    return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+def create_completion(messages, max_tokens, timeout=20, deadline=None, **kwargs):
+    """
+    One rate-limited chat completion with retries on 429/5xx
+
+    deadline is a time.monotonic() value; DeadlineExceeded is raised once
+    it has passed instead of starting another attempt.
+    """
+    tokens = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+    for attempt in range(MAX_RETRIES + 1):
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not rate_limiter.acquire(tokens, deadline):
+                raise DeadlineExceeded("summarization deadline reached")
+            timeout = min(timeout, deadline - time.monotonic())
+        else:
+            rate_limiter.acquire(tokens)
+        start = time.perf_counter()
+        try:
+            # Retries are handled here so they also go through the rate limiter.
+            response = get_client().with_options(max_retries=0).chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                **kwargs
+            )
+        except Exception as e:
+            LLM_SECONDS.observe(time.perf_counter() - start, outcome="error")
+            if attempt == MAX_RETRIES or not _retryable(e):
+                raise
+            delay = _backoff(attempt, e)
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise
+            print(f"OpenAI call failed ({e}), retrying in {delay:.1f}s")
+            LLM_RETRIES.inc()
+            time.sleep(delay)
+            continue
+        LLM_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+        if response.usage is not None:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, kind="prompt")
+            LLM_TOKENS.inc(response.usage.completion_tokens, kind="completion")
+        return response
+
+def summarize_text(text, max_chars=400, deadline=None, check_cache=True):
+    """check_cache=False skips the lookup for callers that already missed it; the result is still cached"""
+    text = text[:max_chars]
+    key = cache_key(MODEL, PROMPT_TEMPLATE, text)
+    cached = summary_cache.get(key) if check_cache else None
+    if cached is not None:
+        return cached
+
+    prompt = PROMPT_TEMPLATE.format(text=text)
+    response = create_completion(
+        [{"role": "user", "content": prompt}],
         max_tokens=120,   # smaller response
-        timeout=20        # fail fast instead of hanging forever
+        timeout=20,       # fail fast instead of hanging forever
+        deadline=deadline
     )
-    return response.choices[0].message["content"]
+    summary = response.choices[0].message.content
+    summary_cache.put(key, summary, MODEL)
+    return summary
+
+def warm_summary_cache(articles, max_chars=400):
+    """Seed the cache from articles that already carry a "text" and "summary" """
+    entries = (
+        (cache_key(MODEL, PROMPT_TEMPLATE, article["text"][:max_chars]), article["summary"])
+        for article in articles
+        if article.get("text") and article.get("summary")
+    )
+    return summary_cache.warm(entries, MODEL)
+
+BATCH_TOKEN_BUDGET = int(os.getenv("SUMMARY_BATCH_TOKEN_BUDGET", "2000"))
+BATCH_MAX_ITEMS = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", "8"))
+BATCH_OUTPUT_TOKENS = 120   # per item, same as a single summary
+BATCH_PROMPT = (
+    "Summarize each text below in 3-4 concise bullet points. "
+    'Reply with a JSON object {"summaries": [{"id": <id>, "summary": "<bullets>"}]} '
+    "containing exactly one entry per id.\n\n"
+)
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text.
+    return len(text) // 4 + 1
+
+def _pack_batches(items, token_budget, max_items):
+    """Group (index, text) pairs so each batch's prompt stays under token_budget"""
+    batches, current, used = [], [], estimate_tokens(BATCH_PROMPT)
+    for index, text in items:
+        cost = estimate_tokens(text) + BATCH_OUTPUT_TOKENS + 10
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], estimate_tokens(BATCH_PROMPT)
+        current.append((index, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _summarize_one_batch(batch, deadline=None):
+    """Return {index: summary} for one packed request; raises ValueError on a malformed reply"""
+    payload = json.dumps([{"id": index, "text": text} for index, text in batch], ensure_ascii=False)
+    response = create_completion(
+        [{"role": "user", "content": BATCH_PROMPT + payload}],
+        max_tokens=BATCH_OUTPUT_TOKENS * len(batch),
+        timeout=20 + 5 * len(batch),
+        deadline=deadline,
+        response_format={"type": "json_object"}
+    )
+    data = json.loads(response.choices[0].message.content)
+    entries = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("batch reply is not a list of {id, summary} objects")
+    summaries = {}
+    for entry in entries:
+        if isinstance(entry.get("summary"), str) and entry["summary"].strip():
+            summaries[int(entry["id"])] = entry["summary"].strip()
+    expected = {index for index, _ in batch}
+    if set(summaries) != expected:
+        raise ValueError(f"batch reply covered ids {sorted(summaries)}, expected {sorted(expected)}")
+    return summaries
+
+def _run_batch(batch, max_chars, deadline):
+    # summarize_batch already looked every text up in the cache.
+    if len(batch) == 1:
+        index, text = batch[0]
+        return {index: summarize_text(text, max_chars, deadline, check_cache=False)}
+    try:
+        return _summarize_one_batch(batch, deadline)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Batch of {len(batch)} was malformed ({e}), falling back to single requests")
+    summaries = {}
+    for index, text in batch:
+        try:
+            summaries[index] = summarize_text(text, max_chars, deadline, check_cache=False)
+        except DeadlineExceeded:
+            break
+        except Exception as e:
+            print(f"Error summarizing article: {e}")
+    return summaries
+
+def summarize_batch(texts, max_chars=400, token_budget=None, max_items=None,
+                    concurrency=None, deadline=None):
+    """
+    Summarize many texts with as few requests as possible
+
+    Returns one summary per input text, or None where summarizing failed.
+    Cached texts are answered locally; the rest are packed into JSON
+    requests that run on up to `concurrency` workers under the shared rate
+    limiter, and a batch whose reply is malformed is retried item by item.
+    Work still queued after `deadline` seconds is cancelled.
+    """
+    token_budget = token_budget or BATCH_TOKEN_BUDGET
+    max_items = max_items or BATCH_MAX_ITEMS
+    concurrency = concurrency or CONCURRENCY
+    cutoff = time.monotonic() + deadline if deadline else None
+    texts = [text[:max_chars] for text in texts]
+    results = [None] * len(texts)
+
+    pending = {}
+    for index, text in enumerate(texts):
+        cached = summary_cache.get(cache_key(MODEL, PROMPT_TEMPLATE, text))
+        if cached is not None:
+            results[index] = cached
+        else:
+            # Identical texts share one slot in the request.
+            pending.setdefault(text, []).append(index)
+
+    unique = [(indexes[0], text) for text, indexes in pending.items()]
+    batches = _pack_batches(unique, token_budget, max_items)
+    if not batches:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(batches)), thread_name_prefix="summarize")
+    futures = {executor.submit(_run_batch, batch, max_chars, cutoff): batch for batch in batches}
+    done, not_done = wait(futures, timeout=None if cutoff is None else max(0, cutoff - time.monotonic()))
+    # Anything unfinished at the deadline is dropped; queued batches never start.
+    executor.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        print(f"Summarization deadline reached with {len(not_done)} of {len(batches)} batches unfinished")
 
+    for future in done:
+        batch = futures[future]
+        try:
+            summaries = future.result()
+        except Exception as e:
+            print(f"Batch of {len(batch)} failed: {e}")
+            continue
+        for index, text in batch:
+            summary = summaries.get(index)
+            if summary is None:
+                continue
+            summary_cache.put(cache_key(MODEL, PROMPT_TEMPLATE, text), summary, MODEL)
+            for duplicate in pending[text]:
+                results[duplicate] = summary
+    return results
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite3"))
+EVICT_EVERY = 100
+MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "50000"))
+TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+
+
+def cache_key(model, template, text):
+    """Content address of one summarization request"""
+    payload = json.dumps([model, template, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent SQLite cache of LLM summaries
+
+    Entries older than ttl seconds are treated as misses, and once the
+    table grows past max_entries the least recently used rows are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL,"
+                " model TEXT,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, summary, model=None):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, model, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, summary, model, now, now),
+            )
+            conn.commit()
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def warm(self, entries, model=None):
+        """Insert (key, summary) pairs that are not cached yet; returns the count added"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO summaries (key, summary, model, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                ((key, summary, model, now, now) for key, summary in entries),
+            )
+            conn.commit()
+            added = conn.total_changes - before
+        self.evict()
+        return added
+
+    def evict(self):
+        with self._lock:
+            conn = self._connect()
+            if self.ttl:
+                conn.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl,))
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM summaries WHERE key IN ("
+                    " SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
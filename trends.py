@@ -0,0 +1,355 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from extractive import STOPWORDS
+
+TRENDS_PATH = os.getenv("TREND_INDEX_PATH", os.path.join("data", "trends.sqlite3"))
+# Days of history a term's latest day is compared against.
+BASELINE_DAYS = int(os.getenv("TREND_BASELINE_DAYS", "14"))
+# Articles a term needs on the latest day before it can count as rising.
+MIN_COUNT = int(os.getenv("TREND_MIN_COUNT", "3"))
+# Standard deviations above its baseline a term needs to count as rising.
+MIN_SCORE = float(os.getenv("TREND_MIN_SCORE", "2"))
+DAY = 86400
+
+SCHEMA = [
+    # Articles per (term, source, day) that mention the term at least once,
+    # and the version that last changed the count. Counts that fall to 0 are
+    # kept so other processes see the change.
+    "CREATE TABLE IF NOT EXISTS term_counts ("
+    " term TEXT NOT NULL,"
+    " source TEXT NOT NULL,"
+    " day INTEGER NOT NULL,"
+    " count INTEGER NOT NULL,"
+    " version INTEGER NOT NULL DEFAULT 0,"
+    " PRIMARY KEY (term, source, day)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS term_counts_day ON term_counts (day)",
+    # What each article contributed, so a changed summary replaces its old terms.
+    "CREATE TABLE IF NOT EXISTS indexed ("
+    " article_id INTEGER PRIMARY KEY,"
+    " source TEXT NOT NULL,"
+    " day INTEGER NOT NULL,"
+    " terms TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+]
+# Columns added after the first release, for databases created before them.
+MIGRATIONS = [
+    ("term_counts", "version", "ALTER TABLE term_counts ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+]
+# Run after the migrations, since they index added columns.
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS term_counts_version ON term_counts (version)",
+]
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+# Words that fill headlines and summary bullets without saying what they are about.
+TREND_STOPWORDS = STOPWORDS | frozenset(
+    "new just now one two first via using use used based says said like get gets make makes "
+    "into out up all any some other only over many much very well way ways here".split()
+)
+
+
+def terms(text):
+    """Distinct words and two-word phrases of a text, lower-cased, stopwords left out"""
+    words = [w for w in _WORD.findall((text or "").lower()) if len(w) > 1 and not w.isdigit()]
+    keep = [w not in TREND_STOPWORDS for w in words]
+    found = {w for w, k in zip(words, keep) if k}
+    found.update(f"{a} {b}" for a, b, ka, kb in zip(words, words[1:], keep, keep[1:]) if ka and kb)
+    return found
+
+
+def day_of(timestamp):
+    return int(timestamp) // DAY
+
+
+def _day_label(day):
+    return datetime.fromtimestamp(day * DAY, timezone.utc).strftime("%Y-%m-%d")
+
+
+class TrendIndex:
+    """
+    Term and bigram counts by day and source, for finding rising topics
+
+    SQLite holds the full history; memory holds a dense
+    (source, term, day) array of the last baseline_days + 1 days, which
+    add() updates in place and rising() reads. Every write bumps a version
+    in the database and stamps the counts it changed with it, so on the
+    next read another process only applies the counts changed since the
+    version its window reflects. The window is loaded in full on the first
+    read and when the day rolls over.
+    """
+
+    def __init__(self, path=TRENDS_PATH, baseline_days=BASELINE_DAYS, min_count=MIN_COUNT, min_score=MIN_SCORE):
+        self.path = path
+        self.baseline_days = baseline_days
+        self.min_count = min_count
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self._conn = None
+        self._version = None        # database version the window reflects
+        self._end = None            # last day in the window
+        self._sources = {}
+        self._terms = {}
+        self._term_names = []
+        self._counts = np.zeros((0, 0, baseline_days + 1), dtype=np.int32)
+        self._cache = {}
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Counts can be rebuilt from the article store; skip the fsync per commit.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for table, column, statement in MIGRATIONS:
+                if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(statement)
+            for statement in INDEXES:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _db_version(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def _source_id(self, source):
+        index = self._sources.get(source)
+        if index is None:
+            index = self._sources[source] = len(self._sources)
+            extra = np.zeros((1,) + self._counts.shape[1:], dtype=np.int32)
+            self._counts = np.concatenate([self._counts, extra])
+        return index
+
+    def _term_ids(self, names):
+        ids = np.empty(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            index = self._terms.get(name)
+            if index is None:
+                index = self._terms[name] = len(self._term_names)
+                self._term_names.append(name)
+            ids[i] = index
+        if len(self._term_names) > self._counts.shape[1]:
+            # Grow by doubling so adding terms stays amortised O(1).
+            capacity = max(1024, 2 * len(self._term_names))
+            grown = np.zeros((self._counts.shape[0], capacity, self._counts.shape[2]), dtype=np.int32)
+            grown[:, :self._counts.shape[1]] = self._counts
+            self._counts = grown
+        return ids
+
+    def _load(self, conn, end):
+        """Rebuild the in-memory window ending on day end from the database"""
+        start = end - self.baseline_days
+        rows = conn.execute(
+            "SELECT term, source, day, count FROM term_counts WHERE day BETWEEN ? AND ?", (start, end)
+        ).fetchall()
+        self._sources, self._terms, self._term_names = {}, {}, []
+        self._counts = np.zeros((0, 0, self.baseline_days + 1), dtype=np.int32)
+        self._end = end
+        if rows:
+            names, sources, days, counts = zip(*rows)
+            self._apply(names, sources, np.array(days), np.array(counts))
+        self._version = self._db_version(conn)
+        self._cache.clear()
+
+    def _catch_up(self, conn):
+        """Apply the counts other processes changed since the window's version"""
+        version = self._db_version(conn)
+        start = self._end - self.baseline_days
+        # Without statistics SQLite prefers the day index, which scans the whole window.
+        rows = conn.execute(
+            "SELECT term, source, day, count FROM term_counts INDEXED BY term_counts_version"
+            " WHERE version > ? AND day BETWEEN ? AND ?",
+            (self._version, start, self._end),
+        ).fetchall()
+        if rows:
+            names, sources, days, counts = zip(*rows)
+            source_ids = np.array([self._source_id(source) for source in sources], dtype=np.int64)
+            term_ids = self._term_ids(names)
+            # Whole counts rather than deltas, so a row read twice does no harm.
+            self._counts[source_ids, term_ids, np.array(days) - start] = counts
+        self._version = version
+        self._cache.clear()
+
+    def _apply(self, names, sources, days, deltas):
+        """Add deltas to the window; days outside it are only kept in the database"""
+        inside = (days >= self._end - self.baseline_days) & (days <= self._end)
+        if not inside.any():
+            return
+        picked = np.flatnonzero(inside)
+        source_ids = np.array([self._source_id(sources[i]) for i in picked], dtype=np.int64)
+        term_ids = self._term_ids([names[i] for i in picked])
+        day_ids = days[picked] - (self._end - self.baseline_days)
+        np.add.at(self._counts, (source_ids, term_ids, day_ids), deltas[picked].astype(np.int32))
+
+    def add(self, articles, now=None):
+        """
+        Count the terms of stored articles (dicts with id, source, published,
+        title and summary); an article seen before has its old terms removed
+        first. Returns how many articles changed the counts.
+        """
+        now = time.time() if now is None else now
+        documents = {}
+        for article in articles:
+            # Feed clocks run ahead at times; nothing is counted after today.
+            day = day_of(min(article.get("published") or now, now))
+            words = "\n".join(sorted(terms(f"{article['title']}\n{article.get('summary') or ''}")))
+            documents[article["id"]] = (article["source"], day, words)
+        if not documents:
+            return 0
+
+        with self._lock:
+            conn = self._connect()
+            # Taken before the previous terms and the version are read, so
+            # two processes indexing the same article never both count it.
+            conn.execute("BEGIN IMMEDIATE")
+            ids = list(documents)
+            previous = {}
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                previous.update((row[0], row[1:]) for row in conn.execute(
+                    f"SELECT article_id, source, day, terms FROM indexed"
+                    f" WHERE article_id IN ({','.join('?' * len(chunk))})", chunk))
+
+            # Every (term, source, day) an article adds (+1) or takes back (-1),
+            # as integer ids so the sums below run in NumPy.
+            term_ids, source_ids = {}, {}
+            term_column, source_column, day_column, signs, changed = [], [], [], [], []
+            for article_id, document in documents.items():
+                old = previous.get(article_id)
+                if old == document:
+                    continue
+                changed.append((article_id,) + document)
+                for (source, day, words), sign in ((old or (None, None, ""), -1), (document, 1)):
+                    if not words:
+                        continue
+                    ids = [term_ids.setdefault(term, len(term_ids)) for term in words.split("\n")]
+                    term_column.extend(ids)
+                    source_column.extend([source_ids.setdefault(source, len(source_ids))] * len(ids))
+                    day_column.extend([day] * len(ids))
+                    signs.extend([sign] * len(ids))
+            if not changed:
+                conn.rollback()
+                return 0
+
+            entries = []
+            if signs:
+                first_day = min(day_column)
+                span = max(day_column) - first_day + 1
+                keys = (np.array(term_column, dtype=np.int64) * len(source_ids)
+                        + np.array(source_column, dtype=np.int64)) * span + (np.array(day_column) - first_day)
+                unique, inverse = np.unique(keys, return_inverse=True)
+                deltas = np.bincount(inverse, weights=signs).astype(np.int64)
+                unique, deltas = unique[deltas != 0], deltas[deltas != 0]
+                rest, day_offsets = np.divmod(unique, span)
+                term_index, source_index = np.divmod(rest, len(source_ids))
+                term_names, source_names = list(term_ids), list(source_ids)
+                entries = [(term_names[t], source_names[s], first_day + int(d), int(n)) for t, s, d, n
+                           in zip(term_index.tolist(), source_index.tolist(), day_offsets.tolist(), deltas.tolist())]
+
+            version = self._db_version(conn)
+            conn.executemany(
+                "INSERT INTO term_counts (term, source, day, count, version) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (term, source, day) DO UPDATE SET count = count + excluded.count,"
+                " version = excluded.version",
+                (entry + (version + 1,) for entry in entries),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO indexed (article_id, source, day, terms) VALUES (?, ?, ?, ?)",
+                changed,
+            )
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('version', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (version + 1,),
+            )
+            conn.commit()
+
+            # Keep the window current in place unless it already missed another writer.
+            if self._version == version:
+                self._apply([e[0] for e in entries], [e[1] for e in entries],
+                            np.array([e[2] for e in entries], dtype=np.int64),
+                            np.array([e[3] for e in entries], dtype=np.int64))
+                self._version = version + 1
+                self._cache.clear()
+            return len(changed)
+
+    def rising(self, source=None, limit=10, now=None):
+        """
+        Terms mentioned most above their usual rate on the latest day
+
+        A term's score is how many standard deviations its article count on
+        that day lies above its mean over the baseline_days before it; the
+        variance is smoothed by 1 so a term new to the window does not get
+        an infinite score. Returns {"days": [...], "terms": [...]} with each
+        term's daily counts as its series.
+        """
+        end = day_of(time.time() if now is None else now)
+        with self._lock:
+            conn = self._connect()
+            if self._end != end or self._version is None:
+                self._load(conn, end)
+            elif self._version != self._db_version(conn):
+                self._catch_up(conn)
+            key = (source, limit)
+            if key not in self._cache:
+                self._cache[key] = self._rising(source, limit)
+            return self._cache[key]
+
+    def _rising(self, source, limit):
+        days = [_day_label(day) for day in range(self._end - self.baseline_days, self._end + 1)]
+        vocabulary = len(self._term_names)
+        if source is None:
+            window = self._counts[:, :vocabulary]
+            latest = window[:, :, -1].sum(axis=0)
+        elif source in self._sources:
+            window = self._counts[self._sources[source], None, :vocabulary]
+            latest = window[0, :, -1]
+        else:
+            return {"days": days, "terms": []}
+
+        # Only terms frequent enough on the latest day need their history read.
+        candidates = np.flatnonzero(latest >= self.min_count)
+        counts = window[:, candidates].sum(axis=0)
+        latest, history = counts[:, -1], counts[:, :-1]
+        mean = history.mean(axis=1)
+        scores = (latest - mean) / np.sqrt(history.var(axis=1) + 1)
+        rising = np.flatnonzero(scores >= self.min_score)
+        # By score, then by how often the term came up that day; on a tie a
+        # phrase goes before the words in it.
+        phrases = np.array([self._term_names[candidates[i]].count(" ") for i in rising], dtype=np.int64)
+        order = rising[np.lexsort((-phrases, -latest[rising], -scores[rising]))]
+
+        picked, picked_words = [], []
+        for index in order:
+            name = self._term_names[candidates[index]]
+            words = set(name.split(" "))
+            # A single word of a phrase that is already listed adds nothing.
+            if any(words < other for other in picked_words):
+                continue
+            picked_words.append(words)
+            picked.append({
+                "term": name,
+                "count": int(latest[index]),
+                "baseline": round(float(mean[index]), 2),
+                "score": round(float(scores[index]), 2),
+                "series": counts[index].tolist(),
+            })
+            if len(picked) >= limit:
+                break
+        return {"days": days, "terms": picked}
+
+    def indexed(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM indexed").fetchone()[0]